@@ -1,7 +1,11 @@
+import os
 import sys
-import math
+import json
+import mmap
+import time
+import heapq
+import itertools
 import random
-from queue import PriorityQueue
 
 #helpful things to keep track of
 DIRECTIONS_EVEN = [[1,0],[0,-1],[-1,-1],[-1,0],[-1,1],[0,1]]
@@ -9,41 +13,17 @@ DIRECTIONS_ODD = [[1,0],[1,-1],[0,-1],[-1,0],[0,1],[1,1]]
 MAP_WIDTH = 23
 MAP_HEIGHT = 21
 MAX_RUM_AMOUNT = 100
-
-#keep track of the entities that are active on the map
-ENTITIES = {}
-
-#the current action our ships are doing
-action = {}
-prev_action = {}
-prev_ship = []
-
-mines_seen = []
-
-LAST_CANNONBALL     = {}
-LAST_MINE           = {}
+FIRE_DISTANCE_MAX = 10
 
 CANNONBALL_COOLDOWN = 1
 MINE_COOLDOWN = 4
 
+#turn off to silence debug(), e.g. when lots of bots play in one process
+DEBUG = True
+
 #helper method to view debug messages
 def debug(msg):
-    if type(msg) is dict:
-        s = str(msg)
-        try:
-            if msg["type"] == "BARREL":
-                s = "BARREL {}, x:{}, y:{}, r:{}".format(msg["id"], msg["x"], msg["y"], msg["rum"])
-            elif msg["type"] == "SHIP":
-                s = "SHIP {}, x:{}, y:{}, o:{}, s:{}, r:{}, c:{}".format(msg["id"], msg["x"], msg["y"], msg["orient"], msg["speed"], msg["rum"], msg["me"])
-            elif msg["type"] == "CANNONBALL":
-                s = "CANNONBALL {}, x:{}, y:{}, o:{}, t:{}".format(msg["id"], msg["x"], msg["y"], msg["owner"], msg["time"])
-            elif msg["type"] == "MINE":
-                s = "MINE {}, x:{}, y:{}".format(msg["id"], msg["x"], msg["y"])
-        except:
-            pass
-        
-        print(s, file=sys.stderr)
-    else:
+    if DEBUG:
         print(msg, file=sys.stderr)
 
 #method to return all of the neighbors that are in the map of (x, y)
@@ -56,588 +36,1891 @@ def neighbors(x, y):
 #helper method to get the next cell in direction d from (x, y)
 def neighbor(x, y, d, n=1):
     if n < 0:
-        return neighbor(x, y, (d-3)%6, n=-n)
-    if n == 0:
-        return(x, y)
-    if n == 1:
+        d = (d-3)%6
+        n = -n
+    for i in range(n):
         if y%2 == 1:
-            return (x + DIRECTIONS_ODD[d][0], y + DIRECTIONS_ODD[d][1])
+            x, y = x + DIRECTIONS_ODD[d][0], y + DIRECTIONS_ODD[d][1]
         else:
-            return (x + DIRECTIONS_EVEN[d][0], y + DIRECTIONS_EVEN[d][1])
-    if n > 1:
-        nx, ny = neighbor(x, y, d, n=1)
-        return neighbor(nx, ny, d, n=n-1)
-
-#returns a entity at (x, y) if one is there
-def entity_at_point(x, y):
-    for ent in ENTITIES.values():
-        if ent in ships():
-            if (x, y) in coords_of_ship(ent["id"]):
-                return ent
-        else:
-            ent_coord = (ent["x"], ent["y"])
-            if (x, y) == ent_coord:
-                return ent
-    return None
+            x, y = x + DIRECTIONS_EVEN[d][0], y + DIRECTIONS_EVEN[d][1]
+    return (x, y)
 
 #determines whether or not (x, y) is inside the map
 def is_inside_map(x, y):
     return x >= 0 and x < MAP_WIDTH and y >= 0 and y < MAP_HEIGHT
 
-#returns true if there is a mine within d spaces of (x, y)
-def mine_nearby(x, y, d=1):
-    for mine in mines():
-        if dist(x, y, mine["x"], mine["y"]) <= d:
-            return True
-    return False
-    
-#measures the distance between two points on a hex grid
-def dist(x1, y1, x2, y2):
-    xp1 = x1 - (y1 - (y1 & 1)) / 2
+#distance from the cube coordinates, works for points outside of the map too
+def hex_dist(x1, y1, x2, y2):
+    xp1 = x1 - (y1 - (y1 & 1)) // 2
     zp1 = y1
     yp1 = -(xp1 + zp1)
-    xp2 = x2 - (y2 - (y2 & 1)) / 2
+    xp2 = x2 - (y2 - (y2 & 1)) // 2
     zp2 = y2
     yp2 = -(xp2 + zp2)
-    return (abs(xp1 - xp2) + abs(yp1 - yp2) + abs(zp1 - zp2)) / 2
-
-#hopefully returns the angle between two points [0-5]
-def angle(sx, sy, tx, ty):
-    dy = (ty - sy) * math.sqrt(3) / 2
-    dx = tx - sx + ((sy - ty) & 1) * 0.5
-    angle = -math.atan2(dy, dx) * 3 / math.pi
-    if angle < 0:
-        angle += 6
-    elif angle >= 6:
-        angle -= 6
-    return angle
-
-#helper to calculate cannonball time between ships
-def cannonball_time_ship(ms, es):
-    mx, my = coords_of_ship(ms)[0]
-    ex, ey = coords_of_ship(es)[1]
-    return cannonball_time(mx, my, ex, ey)
-
-#measures the distance between the bow of ms to the center of es
-def shooting_distance_ship(ms, es):
-    mx, my = coords_of_ship(ms)[0]
-    ex, ey = coords_of_ship(es)[1]
-    return dist(mx, my, ex, ey)
-    
-#measures the distance between the bow of ms to the center of es
-def shooting_distance(ms, x, y):
-    mx, my = coords_of_ship(ms)[0]
-    return dist(mx, my, x, y)
-    
-#number of turns for a cannonball to go from (x1, y1) to (x2, y2)
-def cannonball_time(x1, y1, x2, y2):
-    d = dist(x1, y1, x2, y2)
-    return 1 + round(d / 3.0)
-    
-#predicts the enemy's location when a cannonball lands
-def cannonball_predict(sx, sy, id):
-    enemy = ENTITIES[id]
-    tx = enemy["x"]
-    ty = enemy["y"]
-    to = enemy["orient"]
-    ts = enemy["speed"]
-    
-    for x in range(1, 5):
-        tx, ty = neighbor(tx, ty, to, n=ts)
-        if not is_inside_map(tx, ty):
-            return (None, None)
-        t = cannonball_time(sx, sy, tx, ty)
-        if x == t:
-            return (tx, ty)
-    
-    return (None, None)
-
-#scan forward, returns (dist, entity)
-def ray_cast_from_ship(ship_id):
-    dist = 0
-    for point in line_of_sight(ship_id):
-        dist += 1
-        if dist == 1:
+    return (abs(xp1 - xp2) + abs(yp1 - yp2) + abs(zp1 - zp2)) // 2
+
+#the map never changes, so everything about its geometry is computed once at startup
+#cells are indexed as y * MAP_WIDTH + x, OFF_MAP marks a step off the edge of the map
+CELL_COUNT = MAP_WIDTH * MAP_HEIGHT
+OFF_MAP = -1
+CELL_X = [c % MAP_WIDTH for c in range(CELL_COUNT)]
+CELL_Y = [c // MAP_WIDTH for c in range(CELL_COUNT)]
+
+#NEIGHBOR_TABLE[c * 6 + d] is the next cell from c in direction d
+def build_neighbor_table():
+    table = [OFF_MAP] * (CELL_COUNT * 6)
+    for c in range(CELL_COUNT):
+        x, y = CELL_X[c], CELL_Y[c]
+        for d in range(6):
+            nx, ny = neighbor(x, y, d)
+            if is_inside_map(nx, ny):
+                table[c * 6 + d] = ny * MAP_WIDTH + nx
+    return table
+
+#DIST_TABLE[a * CELL_COUNT + b] is the hex distance between cells a and b
+def build_dist_table():
+    cube = []
+    for c in range(CELL_COUNT):
+        cx = CELL_X[c] - (CELL_Y[c] - (CELL_Y[c] & 1)) // 2
+        cz = CELL_Y[c]
+        cube.append((cx, -(cx + cz), cz))
+    table = bytearray()
+    for ax, ay, az in cube:
+        table += bytes((abs(ax - bx) + abs(ay - by) + abs(az - bz)) // 2 for bx, by, bz in cube)
+    return table
+
+NEIGHBOR_TABLE = build_neighbor_table()
+DIST_TABLE = build_dist_table()
+
+#number of turns for a cannonball to travel d cells
+BALL_TIME = [1 + round(d / 3.0) for d in range(MAP_WIDTH + MAP_HEIGHT)]
+
+#returns the cell index of (x, y), or OFF_MAP
+def cell_index(x, y):
+    if 0 <= x < MAP_WIDTH and 0 <= y < MAP_HEIGHT:
+        return y * MAP_WIDTH + x
+    return OFF_MAP
+
+#the cell n steps from c in direction d, or OFF_MAP once we leave the map
+def neighbor_cell(c, d, n=1):
+    for i in range(n):
+        if c == OFF_MAP:
+            break
+        c = NEIGHBOR_TABLE[c * 6 + d]
+    return c
+
+#cells of a ship centered on c facing o [bow, center, stern]
+def fwd_back_cells(c, o):
+    return [NEIGHBOR_TABLE[c * 6 + o], c, NEIGHBOR_TABLE[c * 6 + (o + 3) % 6]]
+
+#the cells in a straight line from c in direction o up to the edge of the map, without c
+#each ray is worked out the first time it is asked for
+RAYS = [None] * (CELL_COUNT * 6)
+
+def ray(c, o):
+    if c == OFF_MAP:
+        return ()
+    cells = RAYS[c * 6 + o]
+    if cells is None:
+        cells = []
+        n = NEIGHBOR_TABLE[c * 6 + o]
+        while n != OFF_MAP:
+            cells.append(n)
+            n = NEIGHBOR_TABLE[n * 6 + o]
+        cells = RAYS[c * 6 + o] = tuple(cells)
+    return cells
+
+#the commands a ship can steer with, WAIT first so it wins ties
+SHIP_COMMANDS = ["WAIT", "FASTER", "SLOWER", "PORT", "STARBOARD"]
+MAX_SHIP_SPEED = 2
+
+#a ship's (cell, orient, speed) packed into one int, there are CELL_COUNT * 18 of them
+def ship_state(c, o, s):
+    return (c * 6 + o) * 3 + s
+
+def unpack_ship_state(state):
+    return (state // 18, state // 3 % 6, state % 3)
+
+#where every command in SHIP_COMMANDS takes a ship, filled in the first time a state is asked for
+#per state a list of (new state, cells the hull touches on the way, hull at the end of the turn)
+SHIP_MOVES = [None] * (CELL_COUNT * 18)
+
+#the ship moves speed cells forward, stopping at the edge of the map, and then turns
+def ship_moves(state):
+    moves = SHIP_MOVES[state]
+    if moves is None:
+        c, o, s = unpack_ship_state(state)
+        moves = []
+        for cmd in SHIP_COMMANDS:
+            no, ns = o, s
+            if cmd == "FASTER":
+                ns = min(s + 1, MAX_SHIP_SPEED)
+            elif cmd == "SLOWER":
+                ns = max(s - 1, 0)
+            elif cmd == "PORT":
+                no = (o + 1) % 6
+            elif cmd == "STARBOARD":
+                no = (o + 5) % 6
+            
+            nc = c
+            touched = []
+            for i in range(ns):
+                n = NEIGHBOR_TABLE[nc * 6 + o]
+                if n == OFF_MAP:
+                    ns = 0
+                    break
+                nc = n
+                touched.extend(fwd_back_cells(nc, o))
+            hull = [h for h in fwd_back_cells(nc, no) if h != OFF_MAP]
+            touched = tuple(h for h in touched if h != OFF_MAP) + tuple(hull)
+            moves.append((ship_state(nc, no, ns), touched, tuple(hull)))
+        SHIP_MOVES[state] = moves
+    return moves
+
+#the states every state can be reached from in one turn, built with the first move cost table
+SHIP_PREDECESSORS = None
+
+def build_ship_predecessors():
+    preds = [[] for _ in range(CELL_COUNT * 18)]
+    for state in range(CELL_COUNT * 18):
+        for nstate, touched, hull in ship_moves(state):
+            preds[nstate].append(state)
+    return preds
+
+#fewest turns from a ship state until the hull covers a cell, on an empty map
+#one bytearray per target cell indexed by ship state, found with a search backwards from the target
+MOVE_COSTS = {}
+#how many target cells we keep tables for, the oldest is dropped first
+MOVE_COSTS_KEEP = 64
+UNREACHABLE = 255
+
+#the tables of all cells can be written to this file next to Pirate.py with movecosts.py
+#it is memory mapped when it is there, otherwise the tables are built when needed
+MOVE_COST_FILE = "move_costs.bin"
+
+def load_move_cost_file():
+    try:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), MOVE_COST_FILE)
+    except NameError:
+        return None
+    if not os.path.exists(path) or os.path.getsize(path) != CELL_COUNT * CELL_COUNT * 18:
+        return None
+    with open(path, "rb") as f:
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+MOVE_COST_TABLE = load_move_cost_file()
+
+def build_move_costs(tc):
+    global SHIP_PREDECESSORS
+    if SHIP_PREDECESSORS is None:
+        SHIP_PREDECESSORS = build_ship_predecessors()
+    costs = bytearray([UNREACHABLE]) * (CELL_COUNT * 18)
+    
+    #the ships that cover tc already
+    frontier = []
+    for c in [tc] + NEIGHBOR_TABLE[tc * 6:tc * 6 + 6]:
+        if c == OFF_MAP:
             continue
-        ent = entity_at_point(point[0], point[1])
-        if ent is not None:
-            return (dist - 1, ent)
-    return (dist - 1, None)
-
-#returns a list of points from (sx, sy) in direction o to the edge of the map
-def line_of_sight(ship_id):
-    sx = ENTITIES[ship_id]["x"]
-    sy = ENTITIES[ship_id]["y"]
-    o = ENTITIES[ship_id]["orient"]
-    point = None
-    while point is None or is_inside_map(point[0], point[1]):
-        if point is not None:
-            point = neighbor(point[0], point[1], o, n=1)
+        for o in range(6):
+            if tc in fwd_back_cells(c, o):
+                for sp in range(MAX_SHIP_SPEED + 1):
+                    costs[ship_state(c, o, sp)] = 0
+                    frontier.append(ship_state(c, o, sp))
+    
+    turns = 0
+    while frontier:
+        turns += 1
+        reached = []
+        for state in frontier:
+            for prev in SHIP_PREDECESSORS[state]:
+                if costs[prev] == UNREACHABLE:
+                    costs[prev] = turns
+                    reached.append(prev)
+        frontier = reached
+    return costs
+
+#the move cost table for target cell tc
+def move_costs(tc):
+    costs = MOVE_COSTS.get(tc)
+    if costs is None:
+        if MOVE_COST_TABLE is not None:
+            costs = MOVE_COST_TABLE[tc * CELL_COUNT * 18:(tc + 1) * CELL_COUNT * 18]
         else:
-            point = neighbor(sx, sy, o, n=1)
-        
-        yield point
+            costs = build_move_costs(tc)
+        if len(MOVE_COSTS) >= MOVE_COSTS_KEEP:
+            del MOVE_COSTS[next(iter(MOVE_COSTS))]
+        MOVE_COSTS[tc] = costs
+    return costs
+
+#fewest turns for a ship to get to (x, y) on an empty map
+def move_cost(ship, x, y):
+    return move_costs(cell_index(x, y))[ship_state(ship.cell, ship.orient, ship.speed)]
+
+#compact records for the entities on the map, a new set is built every turn
+class Entity:
+    __slots__ = ("id", "x", "y", "cell")
+    type = None
     
-#returns the next command that will move us closer to this point
-def move_to_point(id, tx, ty):
-    ship = ENTITIES[id]
+    def __init__(self, id, x, y):
+        self.id = id
+        self.x = x
+        self.y = y
+        self.cell = cell_index(x, y)
+
+class Ship(Entity):
+    __slots__ = ("orient", "speed", "rum", "mine")
+    type = "SHIP"
     
-    sx, sy, ss, so = (ship["x"], ship["y"], ship["speed"], ship["orient"])
-    debug("move_to_point {}: ({},{}) -> ({},{})".format(id, sx, sy, tx, ty))
+    def __init__(self, id, x, y, orient, speed, rum, mine):
+        Entity.__init__(self, id, x, y)
+        self.orient = orient
+        self.speed = speed
+        self.rum = rum
+        self.mine = mine
+        
+    def __str__(self):
+        return "SHIP {}, x:{}, y:{}, o:{}, s:{}, r:{}, c:{}".format(self.id, self.x, self.y, self.orient, self.speed, self.rum, self.mine)
+
+class Barrel(Entity):
+    __slots__ = ("rum",)
+    type = "BARREL"
     
-    #we are here
-    if (tx, ty) in coords_of_ship(id):
-        return None
+    def __init__(self, id, x, y, rum):
+        Entity.__init__(self, id, x, y)
+        self.rum = rum
         
-    #simulate the move
-    nx, ny = neighbor(sx, sy, so, n=ss)
+    def __str__(self):
+        return "BARREL {}, x:{}, y:{}, r:{}".format(self.id, self.x, self.y, self.rum)
+
+class Mine(Entity):
+    __slots__ = ()
+    type = "MINE"
+    
+    def __str__(self):
+        return "MINE {}, x:{}, y:{}".format(self.id, self.x, self.y)
+
+class Cannonball(Entity):
+    __slots__ = ("owner", "time")
+    type = "CANNONBALL"
     
-    #will we be there in the next move?
-    if (tx, ty) in fwd_back(nx, ny, so):
-        return "WAIT"
+    def __init__(self, id, x, y, owner, time):
+        Entity.__init__(self, id, x, y)
+        self.owner = owner
+        self.time = time
         
-    #can we turn and be there in the next move?
-    if (tx, ty) in fwd_back(nx, ny, (so+1)%6):
-        return "PORT"
+    def __str__(self):
+        return "CANNONBALL {}, x:{}, y:{}, o:{}, t:{}".format(self.id, self.x, self.y, self.owner, self.time)
+
+#what is on every cell, a bitmask per cell in World.occupancy
+OCC_SHIP = 1
+OCC_MINE = 2
+OCC_BARREL = 4
+OCC_CANNONBALL = 8
+#a mine we remember from an earlier turn but can't see now
+OCC_MINE_MEMORY = 16
+OCC_MINES = OCC_MINE | OCC_MINE_MEMORY
+
+#damage a ship takes, as in the referee
+MINE_DAMAGE = 25
+NEAR_MINE_DAMAGE = 10
+LOW_DAMAGE = 25
+HIGH_DAMAGE = 50
+#running into a ship or the edge of the map stops us dead, it doesn't hurt but it's bad too
+COLLISION_PENALTY = 5
+
+#how many turns ahead the threat map looks, a cannonball is in the air for 4 turns at most
+THREAT_TURNS = 4
+THREAT_LAYERS = THREAT_TURNS + 1
+
+#where cannonballs land and mines go off over the next THREAT_TURNS turns
+#a layer per turn, layer t % THREAT_LAYERS is about turn t, so the layers of the turns gone by are reused
+#cannonballs only count down, so each turn only the new ones are added
+class ThreatMap:
+    def __init__(self):
+        self.turn = -1
+        #per layer and cell: cannonballs landing, and mines going off next to it
+        self.balls = [bytearray(CELL_COUNT + 1) for t in range(THREAT_LAYERS)]
+        self.blasts = [bytearray(CELL_COUNT + 1) for t in range(THREAT_LAYERS)]
+        #cannonball id -> turn it lands, for the ones already in the layers
+        self.known = {}
         
-    #can we turn and be there in the next move?
-    if (tx, ty) in fwd_back(nx, ny, (so-1)%6):
-        return "STARBOARD"
+    #a new turn, called by World.load once the entities are in
+    def update(self, world):
+        self.turn += 1
+        turn = self.turn
         
-    #so nothing in the next move..
-    
-    #if we are not moving
-    if ss == 0:
-        #turn towards target
-        ang = angle(sx, sy, tx, ty)
-        turn, steps = turn_to_point(so, ang)
-        if turn is not None:
-            return turn
+        #the layer of last turn becomes the one THREAT_TURNS ahead
+        self.clear_layer((turn - 1) % THREAT_LAYERS)
+        for ball_id, landing in list(self.known.items()):
+            if landing <= turn:
+                del self.known[ball_id]
+        
+        #add the cannonballs fired since last turn, start over if the ones we know don't add up
+        seen = 0
+        for ball in world.cannonballs():
+            landing = turn + ball.time
+            known = self.known.get(ball.id)
+            if known == landing:
+                seen += 1
+            elif known is None and ball.time > 0:
+                self.add(world, ball, landing)
+                seen += 1
+            elif ball.time > 0:
+                self.rebuild(world)
+                break
         else:
-            return "FASTER"
-    #if we are moving slowly
-    if ss == 1:
-        #supose we've already moved
-        sx, sy = neighbor(sx, sy, so, n=1)
-        
-        #are we still headed in the right direction?
-        ang = angle(sx, sy, tx, ty)
-        turn, steps = turn_to_point(so, ang)
-        
-        if turn is not None:
-            return turn
+            if seen != len(self.known):
+                self.rebuild(world)
+                    
+    def clear_layer(self, layer):
+        self.balls[layer][:] = bytes(CELL_COUNT + 1)
+        self.blasts[layer][:] = bytes(CELL_COUNT + 1)
             
-        #how many more steps in this direction?
-        steps_forward = steps_in_initial_direction_to_point(sx, sy, tx, ty)
-        if steps_forward >= 2:
-            return "FASTER"
-        else:
-            return "WAIT"
-    if ss == 2:
-        #supose we've already moved
-        sx, sy = neighbor(sx, sy, so, n=2)
+    def rebuild(self, world):
+        for layer in range(THREAT_LAYERS):
+            self.clear_layer(layer)
+        self.known.clear()
+        for ball in world.cannonballs():
+            if 0 < ball.time <= THREAT_TURNS:
+                self.add(world, ball, self.turn + ball.time)
+            
+    #a cannonball lands on its cell, and sets off a mine that is there
+    def add(self, world, ball, landing):
+        self.known[ball.id] = landing
+        layer = landing % THREAT_LAYERS
+        c = ball.cell
+        self.balls[layer][c] = min(self.balls[layer][c] + 1, 255)
+        if world.mine_at(c):
+            blasts = self.blasts[layer]
+            for n in NEIGHBOR_TABLE[c * 6:c * 6 + 6]:
+                if n != OFF_MAP:
+                    blasts[n] = min(blasts[n] + 1, 255)
+                
+    #true if a cannonball lands on cell c or a mine goes off next to it in t turns
+    def hit(self, c, t):
+        if not 0 < t <= THREAT_TURNS:
+            return False
+        layer = (self.turn + t) % THREAT_LAYERS
+        return self.balls[layer][c] != 0 or self.blasts[layer][c] != 0
+        
+    #damage to a ship on (bow, center, stern) in t turns
+    def damage(self, bow, c, stern, t):
+        if not self.known or not 0 < t <= THREAT_TURNS:
+            return 0
+        layer = (self.turn + t) % THREAT_LAYERS
+        balls = self.balls[layer]
+        blasts = self.blasts[layer]
+        damage = 0
+        if balls[c]:
+            damage += HIGH_DAMAGE
+        if balls[bow]:
+            damage += LOW_DAMAGE
+        if balls[stern]:
+            damage += LOW_DAMAGE
+        damage += NEAR_MINE_DAMAGE * max(blasts[bow], blasts[c], blasts[stern])
+        return damage
+
+#how many answers a TurnCache keeps, the oldest is dropped first
+TURN_CACHE_SIZE = 4096
+
+#answers to questions about one turn, keyed on the turn they were asked in
+#asking with another turn throws away everything from the old one
+class TurnCache:
+    def __init__(self, size=TURN_CACHE_SIZE):
+        self.size = size
+        self.turn = None
+        self.values = {}
+        
+    #the cached value for key, worked out with fn() the first time it is asked this turn
+    def get(self, turn, key, fn):
+        if turn != self.turn:
+            self.values.clear()
+            self.turn = turn
+        value = self.values.get(key)
+        if value is None:
+            value = fn()
+            if len(self.values) >= self.size:
+                del self.values[next(iter(self.values))]
+            self.values[key] = value
+        return value
+
+#everything we can see on the map this turn, rebuilt from the input every turn
+class World:
+    def __init__(self):
+        #keep track of the entities that are active on the map
+        self.entities = {}
+        
+        #the entities of this turn split up by type, filled in once while parsing
+        self.ship_list = []
+        self.my_ship_list = []
+        self.enemy_ship_list = []
+        self.barrel_list = []
+        self.mine_list = []
+        self.cannonball_list = []
+        
+        #what is on every cell this turn, rebuilt by index() after the input is parsed
+        #the arrays have one extra slot at the end that always stays empty, so looking up OFF_MAP (-1) finds nothing
+        self.occupancy = bytearray(CELL_COUNT + 1)
+        #id of the first entity on a cell, and the ship whose hull covers it
+        self.occupant = [None] * (CELL_COUNT + 1)
+        self.ship_at = [None] * (CELL_COUNT + 1)
+        
+        #damage rows from safety_row(), per ship id
+        self.safety = {}
+        #least threat damage from a ship state on, per (state, turns ahead), for threat_ahead()
+        self.ahead = {}
+        
+        #the mines out of sight, a MineMemory that load() brings up to date and puts on the grid
+        self.mine_memory = None
+        #the bot's profiler, load() times the mine memory upkeep as its own phase
+        self.profiler = NullProfiler()
         
-        #are we still headed in the right direction?
-        ang = angle(sx, sy, tx, ty)
-        turn, steps = turn_to_point(so, ang)
+        #cannonballs and mines going off over the next turns, kept up to date by load()
+        self.threats = ThreatMap()
         
-        if turn is not None:
-            return turn
+        #counts the turns loaded, the cache forgets everything when it changes
+        self.turn = 0
+        self.cache = TurnCache()
+        
+    #builds the entity records and the occupancy grid from a parsed turn
+    def load(self, values):
+        self.clear()
+        self.turn += 1
+        for i in range(0, len(values), ENTITY_FIELDS):
+            entity_id, entity_type, x, y, arg_1, arg_2, arg_3, arg_4 = values[i:i + ENTITY_FIELDS]
             
-        #how many more steps in this direction?
-        steps_forward = steps_in_initial_direction_to_point(sx, sy, tx, ty)
-        if steps_forward < 3:
-            return "SLOWER"
-        else:
-            return "WAIT"
-        
-    
-    return "WAIT"
-        
-#returns the command that will steer us towards the desired direction
-def turn_to_point(so, to):
-    so = int(so) if so % 1 < .5 else int(so) + 1
-    to = int(to) if to % 1 < .5 else int(to) + 1
-    if so == 6:
-        so = 0
-    if to == 6:
-        to = 0
-    if so == to:
-        return (None, 0)
-    for x in [1, 2, -1, -2]:
-        no = (so + x) % 6
-        if no == to:
-            if x > 0:
-                return ("PORT", x)
+            #create the entity record for reference
+            if entity_type == 0:
+                entity = Ship(entity_id, x, y, arg_1, arg_2, arg_3, arg_4)
+            elif entity_type == 1:
+                entity = Barrel(entity_id, x, y, arg_1)
+            elif entity_type == 2:
+                entity = Cannonball(entity_id, x, y, arg_1, arg_2)
             else:
-                return ("STARBOARD", abs(x))
-    return ("PORT", 3)
-    
-def steps_in_initial_direction_to_point(sx, sy, tx, ty):
-    #get the initial angle
-    ang = angle(sx, sy, tx, ty)
-    #and round it to nearest whole
-    ang = int(ang) if ang % 1 < .5 else int(ang) + 1
-    ang = 0 if ang == 6 else ang
-    
-    new_ang = ang
-    steps = 0
-    while True:
-        sx, sy = neighbor(sx, sy, ang, n=1)
-        new_ang = angle(sx, sy, tx, ty)
-        new_ang = int(new_ang) if new_ang % 1 < .5 else int(new_ang) + 1
-        new_ang = 0 if new_ang == 6 else new_ang
-    
-        if new_ang == ang:
-            steps += 1
-        else:
-            break
-        
-    return steps
-    
-#return list of coords [(front), (center), (rear)]
-def coords_of_ship(x):
-    s = ENTITIES[x]
-    sx = s["x"]
-    sy = s["y"]
-    if s["type"] != "SHIP":
-        return [(sx, sy)]
-    so = s["orient"]
-    return fwd_back(sx, sy, so)
-    #return [neighbor(sx, sy, so), (sx, sy), neighbor(sx, sy, (so-3)%6)]
-    
-def fwd_back(x, y, o):
-    return [neighbor(x, y, o), (x, y), neighbor(x, y, (o-3)%6)]
-    
-#return a list of ships
-def ships():
-    return [x for x in ENTITIES.values() if x["type"] == "SHIP"]
-
-#return a list of my ships
-def my_ships():
-    return [x for x in ships() if x["mine"] == 1]
-
-#return a list of computer ships
-def not_my_ships():
-    return [x for x in ships() if x["mine"] == 0]
-
-#return a list of barrels
-def barrels():
-    return [x for x in ENTITIES.values() if x["type"] == "BARREL"]
-
-#return a list of cannonballs
-def cannonballs():
-    return [x for x in ENTITIES.values() if x["type"] == "CANNONBALL"]
-  
-#return a list of mines 
-def mines():
-    return [x for x in ENTITIES.values() if x["type"] == "MINE"]
-
-#true if ship can shoot a cannonball 
-def can_shoot(ship_id):
-    return loop_counter - LAST_CANNONBALL[ship_id] > CANNONBALL_COOLDOWN
-
-#true if ship can lay a mine
-def can_lay(ship_id):
-    return loop_counter - LAST_MINE[ship_id] > MINE_COOLDOWN
-    
-#get the score of the game
-def score():
-    return (sum(x["rum"] for x in my_ships()), sum(x["rum"] for x in not_my_ships()))
-    
-#return the highest rum count for each team
-def max_team_rum():
-    me = max(my_ships(), key=lambda x:x["rum"])["rum"]
-    you = max(not_my_ships(), key=lambda x:x["rum"])["rum"]
-    return (me, you)
-    
-def is_safe_movement(id, cmd):
-    #all the useful stuff
-    ship = ENTITIES[id]
-    sx = ship["x"]
-    sy = ship["y"]
-    so = ship["orient"]
-    ss = ship["speed"]
-    
-    #did we alter our speed?
-    if cmd is not None and "SLOWER" in cmd:
-        ss -= 1
-    if cmd is not None and "FASTER" in cmd:
-        ss += 1
-    if ss < 0:
-        ss = 0
-    if ss > 2:
-        ss = 2
-    
-    #the ship moves
-    sx, sy = neighbor(sx, sy, so, n=ss)
-    
-    if not is_inside_map(sx, sy):
-        return False
+                entity = Mine(entity_id, x, y)
+            
+            #store these for future computation
+            self.add(entity)
         
-    #get the bow and stern
-    sxb, syb = neighbor(sx, sy, so)
-    sxs, sys = neighbor(sx, sy, (so+3)%6)
+        self.index()
+        if self.mine_memory is not None:
+            self.profiler.phase("parse")
+            self.mine_memory.update(self, self.turn)
+            self.profiler.phase("mines")
+        self.threats.update(self)
+
+    #forget everything from the last turn
+    def clear(self):
+        self.entities.clear()
+        self.safety.clear()
+        self.ahead.clear()
+        for group in (self.ship_list, self.my_ship_list, self.enemy_ship_list, self.barrel_list, self.mine_list, self.cannonball_list):
+            del group[:]
+
+    #store an entity and put it in the list for its type
+    def add(self, ent):
+        self.entities[ent.id] = ent
+        if ent.type == "SHIP":
+            self.ship_list.append(ent)
+            if ent.mine == 1:
+                self.my_ship_list.append(ent)
+            else:
+                self.enemy_ship_list.append(ent)
+        elif ent.type == "BARREL":
+            self.barrel_list.append(ent)
+        elif ent.type == "MINE":
+            self.mine_list.append(ent)
+        elif ent.type == "CANNONBALL":
+            self.cannonball_list.append(ent)
+
+    #fill in the occupancy grid from the entities
+    def index(self):
+        for c in range(CELL_COUNT):
+            self.occupancy[c] = 0
+            self.occupant[c] = None
+            self.ship_at[c] = None
+        for ent in self.entities.values():
+            c = ent.cell
+            if ent.type == "SHIP":
+                for h in fwd_back_cells(c, ent.orient):
+                    if h != OFF_MAP:
+                        self.occupancy[h] |= OCC_SHIP
+                        self.ship_at[h] = ent.id
+                        if self.occupant[h] is None:
+                            self.occupant[h] = ent.id
+                continue
+            if ent.type == "MINE":
+                self.occupancy[c] |= OCC_MINE
+            elif ent.type == "BARREL":
+                self.occupancy[c] |= OCC_BARREL
+            elif ent.type == "CANNONBALL":
+                self.occupancy[c] |= OCC_CANNONBALL
+            if self.occupant[c] is None:
+                self.occupant[c] = ent.id
+
+    #returns a entity at (x, y) if one is there
+    def entity_at_point(self, x, y):
+        ent_id = self.occupant[cell_index(x, y)]
+        if ent_id is None:
+            return None
+        return self.entities[ent_id]
+
+    #true if there is a mine on cell c, one in sight or one we remember
+    def mine_at(self, c):
+        return self.occupancy[c] & OCC_MINES != 0
+
+    #return a list of ships
+    def ships(self):
+        return self.ship_list
+
+    #return a list of my ships
+    def my_ships(self):
+        return self.my_ship_list
+
+    #return a list of computer ships
+    def not_my_ships(self):
+        return self.enemy_ship_list
+
+    #return a list of barrels
+    def barrels(self):
+        return self.barrel_list
+
+    #return a list of cannonballs
+    def cannonballs(self):
+        return self.cannonball_list
+
+    #return a list of mines 
+    def mines(self):
+        return self.mine_list
+
+    #(steps, cell) of the first cell after c in direction o with one of the occupancy bits in mask
+    #looks at k cells at most, (None, OFF_MAP) if there is nothing
+    def first_ahead(self, c, o, mask, k=None):
+        occupancy = self.occupancy
+        for d, n in enumerate(ray(c, o)[:k], 1):
+            if occupancy[n] & mask:
+                return (d, n)
+        return (None, OFF_MAP)
+
+    #returns the next command that will move us closer to this point
+    def move_to_point(self, id, tx, ty):
+        ship = self.entities[id]
     
-    #coords of ship
-    sc = [(sx, sy), (sxb, syb), (sxs, sys)]
+        sx, sy, ss, so = (ship.x, ship.y, ship.speed, ship.orient)
+        debug("move_to_point {}: ({},{}) -> ({},{})".format(id, sx, sy, tx, ty))
     
-    #if were going fast, then also consider one spot in front, time to slow down
-    if ss == 2:
-        sc.append(neighbor(sxb, syb, so))
+        sc = cell_index(sx, sy)
+        tc = cell_index(tx, ty)
     
-    #if the ship rotates
-    if cmd is not None and ( "PORT" in cmd or "STARBOARD" in cmd ):
-        #update the rotation
-        if "PORT" in cmd:
-            so += 1
-        else:
-            so -= 1
-        so = so % 6
+        #we are here
+        if tc in fwd_back_cells(sc, so):
+            return None
         
-        #get the new bow and stern
-        sxb, syb = neighbor(sx, sy, so)
-        sxs, sys = neighbor(sx, sy, (so+3)%6)
+        #take the command that leaves us the fewest turns to go on an empty map, WAIT on ties
+        costs = move_costs(tc)
+        moves = ship_moves(ship_state(sc, so, ss))
+        best = min(range(len(moves)), key=lambda k: costs[moves[k][0]])
+        return SHIP_COMMANDS[best]
+
+    #return the highest rum count for each team
+    def max_team_rum(self):
+        return self.cache.get(self.turn, "max_team_rum", lambda:
+            (max(self.my_ships(), key=lambda x:x.rum).rum, max(self.not_my_ships(), key=lambda x:x.rum).rum))
         
-        #if we turn to face a mine, then.. no.
-        fx, fy = neighbor(sxb, syb, so)
-        eat = entity_at_point(fx, fy)
-        if eat is not None and eat["type"] == "MINE":
-            return False
+    #distance between the centers of two entities, the same both ways
+    def distance(self, a, b):
+        return DIST_TABLE[self.entities[a].cell * CELL_COUNT + self.entities[b].cell]
         
-        #update coords of ship
-        sc.extend([(sxb, syb), (sxs, sys)])
+    #the entities of a group, e.g. "barrels" or "my_ships", closest to entity id first
+    def by_distance(self, id, group):
+        row = self.entities[id].cell * CELL_COUNT
+        return self.cache.get(self.turn, ("by_distance", id, group), lambda:
+            tuple(sorted(getattr(self, group)(), key=lambda x: DIST_TABLE[row + x.cell])))
+
+    #true if the command doesn't get the ship hurt or stuck next turn
+    def is_safe_movement(self, id, cmd):
+        return self.safety_row(id)[steer_index(cmd)] == 0
         
-        #if were going fast, then also consider one spot in front
-        if ss == 2:
-            sc.append(neighbor(sxb, syb, so))
+    #the damage rows of all our ships, {ship id: [damage per command in SHIP_COMMANDS]}
+    def safety_matrix(self):
+        return dict((ship.id, self.safety_row(ship.id)) for ship in self.my_ships())
+        
+    #how bad each command in SHIP_COMMANDS is for a ship next turn, 0 is safe
+    #worked out once per ship and turn, every later question is a lookup
+    def safety_row(self, id):
+        row = self.safety.get(id)
+        if row is None:
+            ship = self.entities[id]
+            row = [self.movement_damage(ship, k) for k in range(len(SHIP_COMMANDS))]
+            self.safety[id] = row
+        return row
+        
+    #the damage we expect when the ship steers with SHIP_COMMANDS[k]
+    #besides real damage, a move counts as bad when it runs into a ship or the edge of the map
+    def movement_damage(self, ship, k):
+        cmd = SHIP_COMMANDS[k]
+        so = ship.orient
+        ss = ship.speed
+        damage = 0
     
-    #see if there is a collision with a mine
-    mine_coords = [(m["x"], m["y"]) for m in mines()]
-    mine_collision = any(e in sc for e in mine_coords)
+        #did we alter our speed?
+        if cmd == "SLOWER":
+            ss = max(ss - 1, 0)
+        if cmd == "FASTER":
+            ss = min(ss + 1, MAX_SHIP_SPEED)
+    
+        #the ship moves, and stops at the edge of the map
+        c = ship.cell
+        for i in range(ss):
+            if NEIGHBOR_TABLE[c * 6 + so] == OFF_MAP:
+                damage += COLLISION_PENALTY
+                break
+            c = NEIGHBOR_TABLE[c * 6 + so]
+        
+        #get the bow and stern
+        bow = NEIGHBOR_TABLE[c * 6 + so]
+        stern = NEIGHBOR_TABLE[c * 6 + (so+3)%6]
     
-    #see if there is a collision with a cannonball that is about to hit
-    ball_coords = [(m["x"], m["y"]) for m in cannonballs() if m["time"] <= 3]
-    ball_collision = any(e in [(sx,sy),(sxb,syb),(sxs,sys)] for e in ball_coords)
+        #cells of ship
+        sc = [c, bow, stern]
     
-    #see if there is a collision with a ship that isn't our own
-    ship_coords = [coords_of_ship(m["id"]) for m in ships() if m["id"] != id]
-    ship_collision = any(e in sc for x in ship_coords for e in x)
+        #if were going fast, then also consider one spot in front, time to slow down
+        if ss == 2:
+            sc.append(neighbor_cell(bow, so))
     
-    #is there a mine exploding beside us in the next turn?
-    for mine in mines():
-        for cb in cannonballs():
-            if (mine["x"], mine["y"]) == (cb["x"], cb["y"]) and cb["time"] == 1:
-                #is this exploding mine beside us?
-                if dist(mine["x"], mine["y"], sxb, syb) == 1 or dist(mine["x"], mine["y"], sxs, sys) == 1:
-                    return False
+        #if the ship rotates
+        if cmd == "PORT" or cmd == "STARBOARD":
+            #update the rotation
+            so = (so + 1) % 6 if cmd == "PORT" else (so - 1) % 6
+        
+            #get the new bow and stern
+            bow = NEIGHBOR_TABLE[c * 6 + so]
+            stern = NEIGHBOR_TABLE[c * 6 + (so+3)%6]
+        
+            #if we turn to face a mine, then.. no.
+            facing = neighbor_cell(bow, so)
+            if self.mine_at(facing):
+                damage += MINE_DAMAGE
         
-    safe = not ( mine_collision or ball_collision or ship_collision )
+            #update cells of ship
+            sc.extend([bow, stern])
+        
+            #if were going fast, then also consider one spot in front
+            if ss == 2:
+                sc.append(facing)
     
-    return safe
-
-# game loop
-loop_counter = 0
-while True:
-    ENTITIES = {}
-    
-    my_ship_count = int(input())  # the number of remaining ships
-    entity_count = int(input())  # the number of entities (e.g. ships, mines or cannonballs)
-    
-    #loop through all of the different entities on the map
-    for i in range(entity_count):
-        entity_id, entity_type, x, y, arg_1, arg_2, arg_3, arg_4 = input().split()
-        entity_id = int(entity_id)
-        x = int(x)
-        y = int(y)
-        arg_1 = int(arg_1)
-        arg_2 = int(arg_2)
-        arg_3 = int(arg_3)
-        arg_4 = int(arg_4)
-        
-        #create the entity dict for reference
-        entity = {"id":entity_id, "type":entity_type, "x":x, "y":y}
-        if entity_type == "SHIP":
-            entity.update({"orient":arg_1, "speed":arg_2, "rum":arg_3, "mine":arg_4})
-        elif entity_type == "BARREL":
-            entity.update({"rum":arg_1})
-        elif entity_type == "CANNONBALL":
-            entity.update({"owner":arg_1, "time":arg_2})
-        elif entity_type == "MINE":
-            #keep track of all the mines we've seen
-            if entity not in mines_seen:
-                mines_seen.append(entity)
-        
-        #store these for future computation
-        ENTITIES[entity_id] = entity
-
-    #make sure we remove any mines_seen if they aren't there anymore
-    for mine in mines_seen:
-        #if there is a ship that could see this mine
-        for ship in my_ships():
-            if dist(mine["x"], mine["y"], ship["x"], ship["y"]) <= 5:
-                #but it wasn't in the entities
-                if mine not in mines() and mine in mines_seen:
-                    mines_seen.remove(mine)
-    #if any cannonballs are above a mine, then remove the mine
-    for mine in mines_seen:
-        for cb in cannonballs():
-            if (mine["x"], mine["y"]) == (cb["x"], cb["y"]) and mine in mines_seen:
-                mines_seen.remove(mine)
-    #if any ships are over a mine, then remove the mine
-    for mine in mines_seen:
-        for ship in ships():
-            if (mine["x"], mine["y"]) in coords_of_ship(ship["id"]) and mine in mines_seen:
-                mines_seen.remove(mine)
-                
+        #mines we run into
+        damage += MINE_DAMAGE * len(set(e for e in sc if self.mine_at(e)))
     
-    #if we like to see the output
-    #for e in ENTITIES.values():
-    #    debug(e)
+        #cannonballs and mines going off, next turn and on the turns after if we can't get away
+        damage += self.threat_ahead(ship_state(c, so, ss), 1)
     
-    MY_SHIP_IDS = [s["id"] for s in my_ships()]
-    COMPUTER_SHIP_IDS = [s["id"] for s in not_my_ships()]
+        #a ship that isn't our own stops us dead
+        if any(self.ship_at[e] is not None and self.ship_at[e] != ship.id for e in sc):
+            damage += COLLISION_PENALTY
     
-    #keep track of my ships this frame
-    prev_ship.append({})
-    for MY_SHIP_ID in MY_SHIP_IDS:
-        #first time, initialize the action variables
-        if loop_counter == 0:
-            LAST_CANNONBALL[MY_SHIP_ID] = -10
-            LAST_MINE[MY_SHIP_ID] = -10
-            action[MY_SHIP_ID] = None
+        return damage
         
-        if action[MY_SHIP_ID] is not None:
-            continue
+    #the threat damage to a ship in state t turns from now, plus the least we can get away with after that
+    def threat_ahead(self, state, t):
+        if not self.threats.known:
+            return 0
+        key = (state, t)
+        damage = self.ahead.get(key)
+        if damage is None:
+            c, o = state // 18, state // 3 % 6
+            damage = self.threats.damage(NEIGHBOR_TABLE[c * 6 + o], c, NEIGHBOR_TABLE[c * 6 + (o + 3) % 6], t)
+            if t < THREAT_TURNS:
+                damage += min(self.threat_ahead(nstate, t + 1) for nstate, touched, hull in ship_moves(state))
+            self.ahead[key] = damage
+        return damage
+
+#the column of a command in World.safety_row, anything that doesn't steer moves like WAIT
+def steer_index(cmd):
+    if cmd is not None:
+        for k in range(1, len(SHIP_COMMANDS)):
+            if SHIP_COMMANDS[k] in cmd:
+                return k
+    return 0
+
+#search effort for all our ships together in one turn, and the most a single search may use
+PATH_NODE_BUDGET = 2000
+PATH_SEARCH_NODES = 1000
+#how many turns ahead other ships count as obstacles, they will have moved after that
+PATH_SHIP_HORIZON = 2
+
+#A* over the (cell, orient, speed) states of a ship, one step is one turn
+#mines, other ships and cannonballs about to land are obstacles
+class Pathfinder:
+    def __init__(self, budget=PATH_NODE_BUDGET):
+        self.budget = budget
+        self.left = budget
+        #the last complete path per ship: (target cell, [states], [command indexes])
+        self.paths = {}
         
-        MY_SHIP = ENTITIES[MY_SHIP_ID]
+    def new_turn(self):
+        self.left = self.budget
         
-        near_alli = sorted([x for x in my_ships() if x["id"] != MY_SHIP_ID], key=lambda x:
-            dist(MY_SHIP["x"],MY_SHIP["y"],x["x"],x["y"]))
-        near_barrels = sorted(barrels(), key=lambda x:
-            dist(MY_SHIP["x"],MY_SHIP["y"],x["x"],x["y"]))
-        near_enemy = sorted(not_my_ships(), key=lambda x:
-            dist(MY_SHIP["x"],MY_SHIP["y"],x["x"],x["y"]))
+    #true if a move that ends depth turns from now runs into something
+    def blocked(self, world, ship_id, ignore, touched, hull, depth):
+        for c in touched:
+            if world.occupancy[c] & OCC_MINES:
+                return True
+            if depth <= PATH_SHIP_HORIZON:
+                other = world.ship_at[c]
+                if other is not None and other != ship_id and other != ignore:
+                    return True
+        for c in hull:
+            if world.threats.hit(c, depth):
+                return True
+        return False
         
-        my_score, your_score = score()
-        my_high, your_high = max_team_rum()
+    #the first command of the best path for ship to get a hull cell on tc, None if we found nothing
+    def first_command(self, world, ship, tc):
+        state = ship_state(ship.cell, ship.orient, ship.speed)
+        ignore = world.ship_at[tc]
         
-        mssx, mssy = coords_of_ship(MY_SHIP_ID)[2]
-        enemy_behind = entity_at_point(mssx, mssy)
+        #keep following last turn's path if we are where it said we would be and it is still clear
+        path = self.paths.pop(ship.id, None)
+        if path is not None and path[0] == tc and len(path[1]) > 2 and path[1][1] == state:
+            states, ks = path[1][1:], path[2][1:]
+            if not any(self.blocked(world, ship.id, ignore, *ship_moves(states[i])[ks[i]][1:], depth=i + 1) for i in range(len(ks))):
+                self.paths[ship.id] = (tc, states, ks)
+                return SHIP_COMMANDS[ks[0]]
         
-        dist_to_enemy = dist(MY_SHIP["x"], MY_SHIP["y"], near_enemy[0]["x"], near_enemy[0]["y"])
-        if len(near_alli) > 0:
-            dist_to_alli = dist(MY_SHIP["x"], MY_SHIP["y"], near_alli[0]["x"], near_alli[0]["y"])
+        states, ks, complete = self.search(world, ship, state, tc, ignore)
+        if not ks:
+            return None
+        if complete:
+            self.paths[ship.id] = (tc, states, ks)
+        return SHIP_COMMANDS[ks[0]]
         
-        #we are hungry
-        if len(near_barrels) > 0 and ( MY_SHIP["rum"] < 90 or MY_SHIP["rum"] < your_high ):
-            action[MY_SHIP_ID] = move_to_point(MY_SHIP_ID, near_barrels[0]["x"], near_barrels[0]["y"])
-    
-        elif len(near_alli) > 0 and len(near_barrels)==0 and MY_SHIP["rum"] < 30 and your_high > my_high and dist_to_alli < dist_to_enemy - 2:
-            if MY_SHIP["speed"] > 0:
-                action[MY_SHIP_ID] = "SLOWER"
-            else:
-                action[MY_SHIP_ID] = "FIRE {} {}".format(MY_SHIP["x"], MY_SHIP["y"])
-            
-            action[near_alli[0]["id"]] = move_to_point(near_alli[0]["id"], MY_SHIP["x"], MY_SHIP["y"])
-        #shoot at an enemy
-        else:
-            #sneaky shoot a mine from mines_seen
-            for enemy in near_enemy:
-                for ex, ey in coords_of_ship(enemy["id"]):
-                    for mine in mines_seen:
-                        if dist(ex, ey, mine["x"], mine["y"]) == 1 and shooting_distance(MY_SHIP_ID, mine["x"], mine["y"]) <= 10:
-                            ex, ey = neighbor(ex, ey, enemy["orient"], n=enemy["speed"])
-                            if dist(ex, ey, mine["x"], mine["y"]) == 1:
-                                action[MY_SHIP_ID] = "FIRE {} {} blindside!".format(mine["x"], mine["y"])
-                                break
-            else:
-                enemy = near_enemy[0]
-                enemy_dist = dist(MY_SHIP["x"], MY_SHIP["y"], enemy["x"], enemy["y"])
-                if enemy_dist > 10:
-                    action[MY_SHIP_ID] = move_to_point(MY_SHIP_ID, enemy["x"], enemy["y"])
-                
-        #override waiting with a cannonball shot
-        if action[MY_SHIP_ID] in [None, "WAIT"] and can_shoot(MY_SHIP_ID):
-            for enemy in not_my_ships():
-                pass
-            enemy = near_enemy[0]
-            px, py = cannonball_predict(MY_SHIP["x"], MY_SHIP["y"], enemy["id"])
-            if px is not None:
-                bx, by = coords_of_ship(MY_SHIP_ID)[0]
-                act = "FIRE {} {}".format(px, py)
-                if dist(bx, by, px, py) <= 10:
-                    if "FIRE" not in ''.join([x if x is not None else '' for x in action.values()]):
-                        action[MY_SHIP_ID] = act
-                    else:
-                        ang = angle(px,py,bx,by)
-                        ang = round(ang)
-                        ang = 0 if ang == 6 else ang
-                        px, py = neighbor(px,py,ang)
-                        action[MY_SHIP_ID] = "FIRE {} {}".format(px, py)
+    #returns ([states], [command indexes], complete), a path to the closest state we got to when we run out of nodes
+    def search(self, world, ship, start, tc, ignore):
+        nodes = min(self.left, PATH_SEARCH_NODES)
+        #the turns it takes on an empty map never overestimate, so they make a good A* heuristic
+        estimate = move_costs(tc)
+        cost = {start: 0}
+        parent = {start: None}
+        h = estimate[start]
+        heap = [(h, 0, start)]
+        closest = (h, 0, start)
+        goal = None
+        expanded = 0
+        while heap and expanded < nodes:
+            f, g, state = heapq.heappop(heap)
+            g = -g
+            if g > cost[state]:
+                continue
+            c = state // 18
+            if tc in fwd_back_cells(c, state // 3 % 6):
+                goal = state
+                break
+            expanded += 1
+            if (f - g, g) < closest[:2]:
+                closest = (f - g, g, state)
+            for k, (nstate, touched, hull) in enumerate(ship_moves(state)):
+                if cost.get(nstate, g + 2) <= g + 1:
+                    continue
+                if self.blocked(world, ship.id, ignore, touched, hull, g + 1):
+                    continue
+                cost[nstate] = g + 1
+                parent[nstate] = (state, k)
+                heapq.heappush(heap, (g + 1 + estimate[nstate], -(g + 1), nstate))
+        self.left -= expanded
+        
+        end = goal if goal is not None else closest[2]
+        states, ks = [end], []
+        while parent[states[-1]] is not None:
+            prev, k = parent[states[-1]]
+            states.append(prev)
+            ks.append(k)
+        states.reverse()
+        ks.reverse()
+        return (states, ks, goal is not None)
+
+#entity types in the order of their type codes in a parsed turn
+ENTITY_TYPES = ["SHIP", "BARREL", "CANNONBALL", "MINE"]
+TYPE_CODES = [(name.encode(), str(code).encode()) for code, name in enumerate(ENTITY_TYPES)]
+#every entity is 8 ints in a parsed turn: id, type code, x, y, arg_1, arg_2, arg_3, arg_4
+ENTITY_FIELDS = 8
+
+#reads the lines of one turn from a binary stream, returns (my_ship_count, values) or None at the end of the input
+def read_turn(stream, started=None):
+    line = stream.readline()
+    if not line.strip():
+        return None
+    if started is not None:
+        started()
+    my_ship_count = int(line)  # the number of remaining ships
+    entity_count = int(stream.readline())  # the number of entities (e.g. ships, mines or cannonballs)
+    block = b"".join([stream.readline() for i in range(entity_count)])
+    return (my_ship_count, parse_entities(block))
+
+#turns the entity lines of a turn into one flat list of ints, ENTITY_FIELDS per entity
+def parse_entities(block):
+    for name, code in TYPE_CODES:
+        block = block.replace(name, code)
+    return list(map(int, block.split()))
+
+#same as parse_entities, for turns that are already split into lines of text
+def parse_lines(lines):
+    return parse_entities("\n".join(lines).encode())
+
+#opt-in timing of each turn, turned on with --profile or PIRATE_PROFILE=1
+#every turn is split into phases, and the calls to the hot helpers are counted
+class TurnProfiler:
+    def __init__(self):
+        self.totals = []
+        self.phases = {}
+        self.calls = {}
+        self.mark = None
+        self.turn_start = None
+        
+    #starts the clock, unless it is already running for this turn
+    def start_turn(self):
+        if self.turn_start is not None:
+            return
+        self.phases = {}
+        self.calls = dict.fromkeys(self.calls, 0)
+        self.turn_start = self.mark = time.perf_counter()
+        
+    #adds the time since the last phase ended to this phase
+    def phase(self, name):
+        now = time.perf_counter()
+        self.phases[name] = self.phases.get(name, 0) + now - self.mark
+        self.mark = now
+        
+    #wraps a function so each call to it is counted
+    def counted(self, name, fn):
+        self.calls[name] = 0
+        def wrapper(*args, **kwargs):
+            self.calls[name] += 1
+            return fn(*args, **kwargs)
+        return wrapper
+        
+    def end_turn(self, turn):
+        total = time.perf_counter() - self.turn_start
+        self.turn_start = None
+        self.totals.append((total, turn))
+        phases = " ".join("{}:{:.2f}".format(k, v * 1000) for k, v in self.phases.items())
+        calls = " ".join("{}:{}".format(k, v) for k, v in self.calls.items())
+        debug("PROF t:{} total:{:.2f}ms {} | {}".format(turn, total * 1000, phases, calls))
+        
+    def summary(self):
+        if not self.totals:
+            return
+        times = sorted(t for t, turn in self.totals)
+        worst, worst_turn = max(self.totals)
+        p50 = times[len(times) // 2]
+        p99 = times[min(len(times) - 1, int(len(times) * .99))]
+        debug("PROF turns:{} p50:{:.2f}ms p99:{:.2f}ms worst:{:.2f}ms (turn {})".format(len(times), p50 * 1000, p99 * 1000, worst * 1000, worst_turn))
+
+#stands in for the profiler when it is off, so the hooks cost next to nothing
+class NullProfiler:
+    def start_turn(self):
+        pass
+        
+    def phase(self, name):
+        pass
+        
+    def end_turn(self, turn):
+        pass
+        
+    def summary(self):
+        pass
+
+#the time we give ourselves for a turn, the game allows 50ms and 1s for the first turn
+TURN_BUDGET = 0.040
+FIRST_TURN_BUDGET = 0.800
+#the time a stage needs left to start at all, stages that don't get it are skipped
+#safety always runs, it makes the default commands everything else improves on
+STAGE_TIME = {
+    "movement": 0.004,
+    "fire": 0.004,
+    "search": 0.006,
+}
+
+#keeps the deadline of a turn, started when the first line of the turn arrives
+#counts the stages it had to skip and the turns that went over the budget anyway
+class TurnClock:
+    def __init__(self, budget=TURN_BUDGET, first_budget=FIRST_TURN_BUDGET):
+        self.budget = budget
+        self.first_budget = first_budget
+        self.started = None
+        self.deadline = None
+        self.turns = 0
+        self.overruns = 0
+        self.skipped = {}
+        #what allows() said this turn, the first letter of the stage, upper case when it was allowed
+        self.checks = []
+        #how long the last turn took
+        self.elapsed = None
+        
+    #starts the clock, unless it is already running for this turn
+    def start(self):
+        if self.started is not None:
+            return
+        self.started = time.perf_counter()
+        self.deadline = self.started + (self.first_budget if self.turns == 0 else self.budget)
+        self.checks = []
+        
+    def left(self):
+        return self.deadline - time.perf_counter()
+        
+    #true if there is time for stage, else the skip is counted
+    def allows(self, stage):
+        if self.left() >= STAGE_TIME[stage]:
+            self.checks.append(stage[0].upper())
+            return True
+        self.checks.append(stage[0])
+        self.skipped[stage] = self.skipped.get(stage, 0) + 1
+        return False
+        
+    def end_turn(self, turn):
+        self.elapsed = time.perf_counter() - self.started
+        over = -self.left()
+        if over > 0:
+            self.overruns += 1
+            debug("TIME t:{} {:.2f}ms over the budget, {} overruns so far".format(turn, over * 1000, self.overruns))
+        self.started = None
+        self.turns += 1
+        
+    def summary(self):
+        skipped = " ".join("{}:{}".format(k, v) for k, v in sorted(self.skipped.items()))
+        debug("TIME turns:{} overruns:{} skipped {}".format(self.turns, self.overruns, skipped or "nothing"))
+
+#how many turns of our ships we remember, stuck detection only looks at the last 2
+HISTORY_DEPTH = 8
+
+#the last few turns of our ships in a fixed ring of slots, so it doesn't grow over a game
+#a slot maps ship id -> (cell, orient, speed, rum) as of that turn
+class ShipHistory:
+    def __init__(self, depth=HISTORY_DEPTH):
+        self.depth = depth
+        self.slots = [{} for _ in range(depth)]
+        self.turn = -1
+        
+    #start recording a new turn over the oldest slot
+    def begin(self, turn):
+        self.turn = turn
+        self.slots[turn % self.depth].clear()
+        
+    def record(self, ship):
+        self.slots[self.turn % self.depth][ship.id] = (ship.cell, ship.orient, ship.speed, ship.rum)
+        
+    #state of a ship ago turns back, None if we don't remember it
+    def get(self, ship_id, ago):
+        if ago >= self.depth or ago > self.turn:
+            return None
+        return self.slots[(self.turn - ago) % self.depth].get(ship_id)
+        
+    #true if the ship sat on the same cell facing the same way for the last turns turns
+    def stuck(self, ship, turns):
+        for ago in range(1, turns + 1):
+            state = self.get(ship.id, ago)
+            if state is None or state[0] != ship.cell or state[1] != ship.orient:
+                return False
+        return True
+
+#mines out of sight for this many turns are forgotten, something may have hit them since
+MINE_MEMORY_TURNS = 60
+#mines are in the input when they are this close to the center of one of our ships
+MINE_VISIBILITY_RANGE = 5
+#how sure we still are of a mine for each turn we haven't seen it
+MINE_CONFIDENCE_DECAY = 0.97
+
+#bitmask of the cells a ship on cell c sees the mines on, built when first asked for
+VISIBILITY_MASKS = {}
+
+def visibility_mask(c):
+    mask = VISIBILITY_MASKS.get(c)
+    if mask is None:
+        row = c * CELL_COUNT
+        mask = 0
+        for n in range(CELL_COUNT):
+            if DIST_TABLE[row + n] <= MINE_VISIBILITY_RANGE:
+                mask |= 1 << n
+        VISIBILITY_MASKS[c] = mask
+    return mask
+
+#the cells of the bits set in mask
+def mask_cells(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+#the mines we have seen, keyed by cell, with the turn we last saw each one
+#at most one per cell, so it can't grow past the size of the map
+#a turn only looks at what changed: the mines in sight, the cells we stopped seeing, the balls and hulls on a mine
+class MineMemory:
+    def __init__(self, expiry=MINE_MEMORY_TURNS):
+        self.expiry = expiry
+        self.mines = {}
+        self.last_seen = {}
+        #the same cells as mines, as a bitmask
+        self.cells = 0
+        #the cells in sight last update, and the ship cells they were worked out for
+        self.sight = 0
+        self.sight_from = None
+        #(turn it runs out, cell) for every mine, a mine seen again since moves its entry back when it comes up
+        self.expiring = []
+        self.queued = set()
+        self.turn = None
+        
+    def __len__(self):
+        return len(self.mines)
+        
+    def __contains__(self, cell):
+        return cell in self.mines
+        
+    def values(self):
+        return self.mines.values()
+        
+    def see(self, mine, turn):
+        if mine.cell not in self.queued and self.expiry is not None:
+            heapq.heappush(self.expiring, (turn + self.expiry, mine.cell))
+            self.queued.add(mine.cell)
+        self.mines[mine.cell] = mine
+        self.last_seen[mine.cell] = turn
+        self.cells |= 1 << mine.cell
+        
+    def forget(self, cell):
+        if self.mines.pop(cell, None) is not None:
+            del self.last_seen[cell]
+            self.cells &= ~(1 << cell)
             
+    #how sure we are the mine on cell is still there, 1 when it is in sight and 0 when we know of none
+    def confidence(self, cell):
+        last_seen = self.last_seen.get(cell)
+        if last_seen is None:
+            return 0.0
+        return MINE_CONFIDENCE_DECAY ** (self.turn - last_seen)
         
-        #are we stuck for the last 2 frames?
-        stuck = True
-        for o in prev_ship[-3:-1]:
-            if not (o[MY_SHIP_ID]["x"] == MY_SHIP["x"] and o[MY_SHIP_ID]["y"] == MY_SHIP["y"] and o[MY_SHIP_ID]["orient"] == MY_SHIP["orient"]):
-                stuck = False
-                break
+    #remember the mines in sight and drop the ones we know are gone
+    #the ones out of sight go on the occupancy grid of the world as OCC_MINE_MEMORY
+    def update(self, world, turn):
+        self.turn = turn
+        seen = 0
+        for mine in world.mines():
+            self.see(mine, turn)
+            seen |= 1 << mine.cell
             
-        if len(prev_ship) > 2 and stuck:
-            acts = ["PORT", "STARBOARD", "FASTER"]
-            acts = [a for a in acts if action[MY_SHIP_ID] not in acts and is_safe_movement(MY_SHIP_ID, a)]
+        #a mine that should be in sight but isn't in the input is gone
+        sight_from = tuple(ship.cell for ship in world.my_ships())
+        if sight_from != self.sight_from:
+            self.sight_from = sight_from
+            self.sight = 0
+            for c in sight_from:
+                self.sight |= visibility_mask(c)
+        for c in list(mask_cells(self.cells & self.sight & ~seen)):
+            self.forget(c)
             
-            if len(acts) > 0:
-                random.shuffle(acts)
-                action[MY_SHIP_ID] = acts[0]
+        #a cannonball on its way to a mine, or a ship over one, sets it off
+        for ball in world.cannonballs():
+            self.forget(ball.cell)
+        for ship in world.ships():
+            for c in fwd_back_cells(ship.cell, ship.orient):
+                self.forget(c)
+                
+        #too long out of sight
+        while self.expiring and self.expiring[0][0] < turn:
+            until, c = heapq.heappop(self.expiring)
+            if c in self.mines and turn - self.last_seen[c] <= self.expiry:
+                heapq.heappush(self.expiring, (self.last_seen[c] + self.expiry, c))
             else:
-                action[MY_SHIP_ID] = random.choice(["PORT", "STARBOARD"])
+                self.forget(c)
+                self.queued.discard(c)
+                    
+        for c in mask_cells(self.cells & ~seen):
+            world.occupancy[c] |= OCC_MINE_MEMORY
+
+#how many moves ahead we predict enemy ships, as far as a cannonball flies
+PREDICT_TURNS = BALL_TIME[FIRE_DISTANCE_MAX]
+#how much we expect each command in SHIP_COMMANDS before we have seen an enemy move, they mostly sail on
+PREDICT_PRIOR = [3.0, 1.0, 1.0, 1.0, 1.0]
+#how much the older observations count each turn, so we follow an enemy changing its ways
+PREDICT_DECAY = 0.8
+#states less likely than this are dropped from a prediction
+PREDICT_MIN_PROB = 0.01
+#the least expected damage worth a cannonball
+MIN_SHOT_VALUE = 10
+#how many of its best shots each ship brings to allocate_fire()
+FIRE_OPTIONS = 4
+#the least expected damage worth dropping a mine for
+MIN_MINE_VALUE = 10
+#how far from its center an enemy's hull gets in PREDICT_TURNS moves
+MINE_REACH = PREDICT_TURNS * MAX_SHIP_SPEED + 1
+
+#guesses where the enemy ships go from how they steered before
+#each enemy gets a distribution over SHIP_COMMANDS, from its moves in the ship history
+class EnemyModel:
+    def __init__(self):
+        #enemy id -> weight of each command in SHIP_COMMANDS
+        self.counts = {}
+        #this turn's predictions per enemy id, and what cannonballs would do to them, built when first asked for
+        self.predictions = {}
+        self.hit_maps = None
+        self.blast_maps = None
+        
+    #work out what each enemy did last turn, call once a turn after the history has this turn's enemies
+    def observe(self, world, history):
+        self.predictions = {}
+        self.hit_maps = None
+        self.blast_maps = None
+        for enemy in world.not_my_ships():
+            counts = self.counts.setdefault(enemy.id, list(PREDICT_PRIOR))
+            last = history.get(enemy.id, 1)
+            if last is None:
+                continue
+            now = ship_state(enemy.cell, enemy.orient, enemy.speed)
+            moves = ship_moves(ship_state(last[0], last[1], last[2]))
+            matches = [k for k in range(len(moves)) if moves[k][0] == now]
+            #nothing matches when it ran into something, then we learn nothing
+            if matches:
+                for k in range(len(counts)):
+                    counts[k] *= PREDICT_DECAY
+                for k in matches:
+                    counts[k] += 1.0 / len(matches)
+        
+    #the chance of each command for an enemy
+    def policy(self, enemy_id):
+        counts = self.counts.get(enemy_id, PREDICT_PRIOR)
+        total = sum(counts)
+        return [w / total for w in counts]
+        
+    #[{state: chance}] of the enemy after 0..PREDICT_TURNS + 1 moves
+    #a ball fired now lands after t + 1 moves for a flight time of t, so there is one move more than PREDICT_TURNS
+    def predict(self, world, enemy):
+        policy = self.policy(enemy.id)
+        layers = [{ship_state(enemy.cell, enemy.orient, enemy.speed): 1.0}]
+        
+        #a ship right in front stops it on the first move, after as many cells as are free
+        free = world.first_ahead(NEIGHBOR_TABLE[enemy.cell * 6 + enemy.orient], enemy.orient, OCC_SHIP, MAX_SHIP_SPEED)[0]
+        free = MAX_SHIP_SPEED if free is None else free - 1
+        
+        for t in range(PREDICT_TURNS + 1):
+            layer = {}
+            for state, p in layers[-1].items():
+                moves = ship_moves(state)
+                for k in range(len(moves)):
+                    q = p * policy[k]
+                    if q >= PREDICT_MIN_PROB:
+                        nstate = moves[k][0]
+                        if t == 0 and nstate % 3 > free:
+                            nstate = ship_state(neighbor_cell(enemy.cell, enemy.orient, free), nstate // 3 % 6, 0)
+                        layer[nstate] = layer.get(nstate, 0.0) + q
+            layers.append(layer)
+        return layers
+        
+    #the predicted states of an enemy, worked out once a turn
+    def layers(self, world, enemy):
+        layers = self.predictions.get(enemy.id)
+        if layers is None:
+            layers = self.predictions[enemy.id] = self.predict(world, enemy)
+        return layers
+        
+    #per number of enemy moves: {cell: {enemy id: expected damage of a cannonball landing on the cell}}
+    def hits(self, world):
+        if self.hit_maps is None:
+            self.hit_maps = [{} for t in range(PREDICT_TURNS + 2)]
+            for enemy in world.not_my_ships():
+                for t, layer in enumerate(self.layers(world, enemy)):
+                    hit_map = self.hit_maps[t]
+                    for state, p in layer.items():
+                        c, o = state // 18, state // 3 % 6
+                        for e, damage in ((c, HIGH_DAMAGE), (NEIGHBOR_TABLE[c * 6 + o], LOW_DAMAGE), (NEIGHBOR_TABLE[c * 6 + (o + 3) % 6], LOW_DAMAGE)):
+                            if e != OFF_MAP:
+                                targets = hit_map.setdefault(e, {})
+                                targets[enemy.id] = targets.get(enemy.id, 0.0) + p * damage
+        return self.hit_maps
+        
+    #the chance each enemy sails over cell c in the next PREDICT_TURNS moves, {enemy id: chance}
+    #moves that pass over it are summed up over the turns, so it is a bit high, and capped at 1
+    def touch_chances(self, world, c):
+        chances = {}
+        for enemy in world.not_my_ships():
+            if DIST_TABLE[enemy.cell * CELL_COUNT + c] > MINE_REACH:
+                continue
+            policy = self.policy(enemy.id)
+            layers = self.layers(world, enemy)
+            chance = 0.0
+            for t in range(PREDICT_TURNS):
+                for state, p in layers[t].items():
+                    for k, (nstate, touched, hull) in enumerate(ship_moves(state)):
+                        if c in touched:
+                            chance += p * policy[k]
+            if chance > 0:
+                chances[enemy.id] = min(1.0, chance)
+        return chances
+        
+    #the same for a cannonball setting off one of the mines we remember, worth less the less sure we are of it
+    def blasts(self, world, mines):
+        if self.blast_maps is None:
+            self.blast_maps = [{} for t in range(PREDICT_TURNS + 2)]
+            for enemy in world.not_my_ships():
+                for t, layer in enumerate(self.layers(world, enemy)):
+                    blast_map = self.blast_maps[t]
+                    for state, p in layer.items():
+                        c, o = state // 18, state // 3 % 6
+                        hull = fwd_back_cells(c, o)
+                        near = {}
+                        for h in hull:
+                            if h == OFF_MAP:
+                                continue
+                            for n in [h] + NEIGHBOR_TABLE[h * 6:h * 6 + 6]:
+                                if n in mines:
+                                    near[n] = (MINE_DAMAGE if n in hull else NEAR_MINE_DAMAGE) * mines.confidence(n)
+                        for m, damage in near.items():
+                            targets = blast_map.setdefault(m, {})
+                            targets[enemy.id] = targets.get(enemy.id, 0.0) + p * damage
+        return self.blast_maps
+
+#how many turns the planner looks ahead, and how much less each turn further away counts
+PLAN_DEPTH = 5
+PLAN_DISCOUNT = 0.9
+#seconds from the start of the turn the planner may run until
+PLAN_TIME = 0.02
+#what each turn further from a ship's target at the end of a plan costs
+TARGET_PULL = 3.0
+#how many commands of the best plan a new candidate changes at most
+PLAN_MUTATIONS = 3
+
+#rolling horizon evolution over the steering commands of all our ships together
+#a plan is a list per ship of PLAN_DEPTH indexes into SHIP_COMMANDS, played out on a simple forward model:
+#ships sail through SHIP_MOVES, pick up barrels, hit mines, run into ships and take the threat map's damage
+#it keeps changing the best plan at random until the deadline, so it always has an answer
+class Planner:
+    def __init__(self, rand, depth=PLAN_DEPTH):
+        self.random = rand
+        self.depth = depth
+        self.weights = [PLAN_DISCOUNT ** t for t in range(depth)]
+        #last turn's best plan, {ship id: [command indexes]}, the warm start of the next turn
+        self.best = {}
+        self.iterations = 0
+        
+    #plays a joint plan out and scores it on rum, damage taken, the shots it leaves room for and the way to the targets
+    #targets: {ship id: cell to head for}, shots: {ship id: what a shot is worth if the ship waits this turn}
+    def evaluate(self, world, ships, plans, targets, shots, barrels):
+        states = [ship_state(ship.cell, ship.orient, ship.speed) for ship in ships]
+        rums = [ship.rum for ship in ships]
+        taken = set()
+        mines_hit = set()
+        score = 0.0
+        for i, ship in enumerate(ships):
+            if plans[i][0] == 0:
+                score += shots.get(ship.id, 0.0)
+        for t in range(self.depth):
+            w = self.weights[t]
+            hulls = []
+            for i, ship in enumerate(ships):
+                nstate, touched, hull = ship_moves(states[i])[plans[i][t]]
+                for c in touched:
+                    occ = world.occupancy[c]
+                    if occ & OCC_MINES and c not in mines_hit:
+                        mines_hit.add(c)
+                        score -= w * MINE_DAMAGE
+                    if occ & OCC_BARREL and c not in taken:
+                        taken.add(c)
+                        gain = min(barrels[c], MAX_RUM_AMOUNT - rums[i])
+                        rums[i] += gain
+                        score += w * gain
+                    if t < PATH_SHIP_HORIZON and occ & OCC_SHIP and world.ship_at[c] != ship.id and world.entities[world.ship_at[c]].mine != 1:
+                        score -= w * COLLISION_PENALTY
+                c, o = nstate // 18, nstate // 3 % 6
+                score -= w * world.threats.damage(NEIGHBOR_TABLE[c * 6 + o], c, NEIGHBOR_TABLE[c * 6 + (o + 3) % 6], t + 1)
+                hulls.append(hull)
+                states[i] = nstate
+            #our own ships in each other's way
+            for i in range(len(hulls)):
+                for j in range(i):
+                    if set(hulls[i]) & set(hulls[j]):
+                        score -= w * COLLISION_PENALTY
+        for i, ship in enumerate(ships):
+            tc = targets.get(ship.id)
+            if tc is not None:
+                score -= TARGET_PULL * move_costs(tc)[states[i]]
+        return score
         
-    #write out the actions for each ship
-    debug(" --- ")
-    for MY_SHIP_ID in MY_SHIP_IDS:
-        MY_SHIP = ENTITIES[MY_SHIP_ID]
+    #the first command for every ship of the best joint plan found before the deadline
+    #seeds: {ship id: [command indexes]} plans to start from, fixed: ship ids whose first command can't change
+    def plan(self, world, ship_ids, seeds, fixed, targets, shots, deadline, max_iterations=None):
+        ships = [world.entities[i] for i in ship_ids]
+        barrels = dict((b.cell, b.rum) for b in world.barrels())
         
-        debug("{}: i:{}, s:{}".format(MY_SHIP_ID, action[MY_SHIP_ID], is_safe_movement(MY_SHIP_ID, action[MY_SHIP_ID])))
+        #start from the better of the seed plans and last turn's best plan moved on by a turn
+        starts = [[seeds[i] for i in ship_ids]]
+        if all(i in self.best for i in ship_ids):
+            warm = [self.best[i][1:] + [0] for i in ship_ids]
+            for n, i in enumerate(ship_ids):
+                if i in fixed:
+                    warm[n][0] = seeds[i][0]
+            starts.append(warm)
+        best, best_score = None, None
+        for plans in starts:
+            score = self.evaluate(world, ships, plans, targets, shots, barrels)
+            if best_score is None or score > best_score:
+                best, best_score = plans, score
         
-        if not is_safe_movement(MY_SHIP_ID, action[MY_SHIP_ID]):
-            acts = ["PORT", "STARBOARD", "FASTER", "SLOWER", "WAIT"]
-            if MY_SHIP["speed"] == 2:
-                acts.remove("FASTER")
-            if MY_SHIP["speed"] == 0:
-                acts.remove("SLOWER")
+        free = [(n, t) for n, i in enumerate(ship_ids) for t in range(self.depth) if t > 0 or i not in fixed]
+        self.iterations = 0
+        while free and time.perf_counter() < deadline and (max_iterations is None or self.iterations < max_iterations):
+            self.iterations += 1
+            plans = [list(p) for p in best]
+            for m in range(self.random.randint(1, PLAN_MUTATIONS)):
+                n, t = self.random.choice(free)
+                plans[n][t] = self.random.randrange(len(SHIP_COMMANDS))
+            score = self.evaluate(world, ships, plans, targets, shots, barrels)
+            #equal plans are taken too, so the search can drift over flat ground
+            if score >= best_score:
+                best, best_score = plans, score
                 
-            acts = [a for a in acts if is_safe_movement(MY_SHIP_ID, a)]
-            debug("{}: safe:{}".format(MY_SHIP_ID, acts))
-            if len(acts) == 0:
-                if MY_SHIP["speed"] < 2:
-                    if prev_action[MY_SHIP_ID] == "FASTER":
-                        action[MY_SHIP_ID] = "PORT"
-                    else:
-                        action[MY_SHIP_ID] = "FASTER"
-                else:
-                    action[MY_SHIP_ID] = "SLOWER"
+        self.best = dict(zip(ship_ids, best))
+        return dict((i, best[n][0]) for n, i in enumerate(ship_ids))
+
+#how many of the closest barrels get ranked by move cost, each new target cell costs a table
+BARREL_CANDIDATES = 4
+#a ship with less rum than this goes for barrels
+HUNGRY_RUM = 90
+#a ship with less rum than this waits for an ally to hand it over, when the ally is this much closer than the enemy
+SHARING_RUM = 30
+SHARING_MARGIN = 2
+#how far away the closest enemy is before we chase it, closer than that allocate_fire() takes over
+CHASE_DISTANCE = 10
+
+#the constants tune.py works on, a params file can set them when the bot starts
+#the rules of the game (cooldowns, firing range, mine visibility) aren't in here
+TUNABLE_PARAMS = [
+    "COLLISION_PENALTY",
+    "PREDICT_DECAY",
+    "PREDICT_MIN_PROB",
+    "MIN_SHOT_VALUE",
+    "MINE_CONFIDENCE_DECAY",
+    "PLAN_DISCOUNT",
+    "TARGET_PULL",
+    "PLAN_MUTATIONS",
+    "BARREL_CANDIDATES",
+    "HUNGRY_RUM",
+    "SHARING_RUM",
+    "SHARING_MARGIN",
+    "CHASE_DISTANCE",
+    "MIN_MINE_VALUE",
+]
+#the params file next to the bot, tune.py writes it
+PARAMS_FILE = "params.json"
+
+#a params file can also set these, they aren't tuned but make the games tune.py plays repeatable
+#a fixed number of planner iterations a turn instead of planning until the deadline, 0 for the deadline
+#with a fixed number the clock doesn't skip stages either, so a game only depends on the seed and not on the machine
+PLAN_ITERATIONS = 0
+SETTINGS = ["PLAN_ITERATIONS"]
+
+#the current value of every tunable constant
+def current_params():
+    return dict((name, globals()[name]) for name in TUNABLE_PARAMS)
+
+#sets the constants in params, {name: value}, values keep the type of the constant
+def apply_params(params):
+    for name, value in params.items():
+        if name not in TUNABLE_PARAMS and name not in SETTINGS:
+            raise ValueError("unknown parameter {!r}".format(name))
+        globals()[name] = type(globals()[name])(value)
+
+#applies a params file, the one next to the bot if there is one and no path is given
+def load_params(path=None):
+    if path is None:
+        try:
+            path = os.path.join(os.path.dirname(os.path.abspath(__file__)), PARAMS_FILE)
+        except NameError:
+            return None
+        if not os.path.exists(path):
+            return None
+    with open(path) as f:
+        params = json.load(f)
+    apply_params(params)
+    return params
+
+load_params(os.environ.get("PIRATE_PARAMS") or None)
+
+#plays the game for one player, everything it remembers between turns lives here
+#so many bots can play in one process, e.g. for simulation and benchmarks
+class Bot:
+    def __init__(self, seed=None, profile=False, plan=True, plan_iterations=None):
+        self.world = World()
+        self.random = random.Random(seed)
+        
+        #the current action our ships are doing
+        self.action = {}
+        self.prev_action = {}
+        self.prev_ship = ShipHistory()
+        
+        #mines we have seen, also the ones out of sight now, the world keeps it up to date
+        self.mines_seen = MineMemory()
+        self.world.mine_memory = self.mines_seen
+        
+        self.last_cannonball = {}
+        self.last_mine = {}
+        self.loop_counter = 0
+        
+        self.pathfinder = Pathfinder()
+        self.enemies = EnemyModel()
+        #improves on the moves of the rules, without it they are played as they are
+        self.planner = Planner(self.random) if plan else None
+        #a fixed number of planner iterations instead of a time limit, it makes games repeatable
+        self.plan_iterations = plan_iterations if plan_iterations is not None else PLAN_ITERATIONS or None
+        #the iterations the planner got this turn, None when it didn't run
+        self.planned = None
+        #the cell each ship is heading for this turn
+        self.targets = {}
+        self.turn_start = None
+        self.clock = TurnClock(float("inf"), float("inf")) if PLAN_ITERATIONS else TurnClock()
+        #the least damaging command for every ship, what it plays when the time runs out
+        self.defaults = {}
+        
+        self.profiler = NullProfiler()
+        if profile:
+            self.enable_profiling()
+            
+    #swap in a real profiler and count the calls to the hot helpers
+    def enable_profiling(self):
+        self.profiler = TurnProfiler()
+        world = self.world
+        world.profiler = self.profiler
+        world.safety_row = self.profiler.counted("safety_row", world.safety_row)
+        world.movement_damage = self.profiler.counted("movement_damage", world.movement_damage)
+        self.fire_options = self.profiler.counted("fire_options", self.fire_options)
+        self.pathfinder.search = self.profiler.counted("search", self.pathfinder.search)
+        if self.planner is not None:
+            self.planner.evaluate = self.profiler.counted("evaluate", self.planner.evaluate)
+        
+    #starts the clock of a turn, the game loop calls it as soon as the first line of input is there
+    def start_turn(self):
+        self.profiler.start_turn()
+        self.clock.start()
+        
+    #true if ship can shoot a cannonball 
+    def can_shoot(self, ship_id):
+        return self.loop_counter - self.last_cannonball[ship_id] > CANNONBALL_COOLDOWN
+
+    #true if ship can lay a mine
+    def can_lay(self, ship_id):
+        return self.loop_counter - self.last_mine[ship_id] > MINE_COOLDOWN
+
+    #the first command on the way to (x, y), None if we are there already
+    #the greedy World.move_to_point is the fallback when the search finds no way at all
+    def move_to_point(self, ship_id, tx, ty):
+        ship = self.world.entities[ship_id]
+        tc = cell_index(tx, ty)
+        self.targets[ship_id] = tc
+        if tc in fwd_back_cells(ship.cell, ship.orient):
+            return None
+        cmd = self.pathfinder.first_command(self.world, ship, tc)
+        if cmd is None:
+            cmd = self.world.move_to_point(ship_id, tx, ty)
+        return cmd
+
+    #the command with the least damage for ship, on ties the old escape: speed up, or turn if that didn't help
+    def safe_default(self, ship_id):
+        ship = self.world.entities[ship_id]
+        damage = self.world.safety_row(ship_id)
+        acts = ["PORT", "STARBOARD", "FASTER", "SLOWER", "WAIT"]
+        if ship.speed == 2:
+            acts.remove("FASTER")
+        if ship.speed == 0:
+            acts.remove("SLOWER")
+        if ship.speed < 2:
+            if self.prev_action.get(ship_id) == "FASTER":
+                escape = "PORT"
             else:
-                action[MY_SHIP_ID] = random.choice(acts)
+                escape = "FASTER"
+        else:
+            escape = "SLOWER"
+        return min(acts, key=lambda a: (damage[steer_index(a)], a != escape))
+        
+    #the hulls of our ships for the next turns, as (bow, center, stern) per number of moves
+    #after this turn's command they are expected to keep going
+    #a ball fired now lands after t + 1 moves of our ships, so this goes one move past PREDICT_TURNS
+    def friendly_hulls(self, ship_ids):
+        hulls = [[] for t in range(PREDICT_TURNS + 2)]
+        for ship_id in ship_ids:
+            ship = self.world.entities[ship_id]
+            state = ship_moves(ship_state(ship.cell, ship.orient, ship.speed))[steer_index(self.action[ship_id])][0]
+            for t in range(1, PREDICT_TURNS + 2):
+                c, o = state // 18, state // 3 % 6
+                hulls[t].append(fwd_back_cells(c, o))
+                state = ship_moves(state)[0][0]
+        return hulls
+        
+    #the damage a cannonball landing on c does to our own ships among hulls
+    def friendly_damage(self, hulls, c):
+        mine = c in self.mines_seen
+        damage = 0
+        for bow, center, stern in hulls:
+            if c == center:
+                damage += HIGH_DAMAGE
+            elif c == bow or c == stern:
+                damage += LOW_DAMAGE
+            elif mine and any(h != OFF_MAP and DIST_TABLE[h * CELL_COUNT + c] <= 1 for h in (bow, center, stern)):
+                damage += NEAR_MINE_DAMAGE
+        return damage
+        
+    #the FIRE_OPTIONS best cells for ship to fire at, as (value, cell, {enemy id: expected damage}, damage to us)
+    #enemies are hit straight on, or by setting off a mine we remember next to them
+    def fire_options(self, ship, hulls):
+        bow = NEIGHBOR_TABLE[ship.cell * 6 + ship.orient]
+        if bow == OFF_MAP:
+            return []
+        row = bow * CELL_COUNT
+        hit_maps = self.enemies.hits(self.world)
+        blast_maps = self.enemies.blasts(self.world, self.mines_seen)
+        options = []
+        #a ball with a flight time of t lands after t + 1 moves, ours and theirs are looked up at the same move
+        for t in range(1, PREDICT_TURNS + 1):
+            moves = t + 1
+            hit_map, blast_map = hit_maps[moves], blast_maps[moves]
+            for c in set(hit_map) | set(blast_map):
+                d = DIST_TABLE[row + c]
+                if d > FIRE_DISTANCE_MAX or BALL_TIME[d] != t:
+                    continue
+                targets = dict(hit_map.get(c, {}))
+                for enemy_id, value in blast_map.get(c, {}).items():
+                    targets[enemy_id] = targets.get(enemy_id, 0.0) + value
+                own = self.friendly_damage(hulls[moves], c)
+                value = sum(targets.values()) - own
+                if value >= MIN_SHOT_VALUE:
+                    options.append((value, c, targets, own))
+        options.sort(key=lambda o: -o[0])
+        return options[:FIRE_OPTIONS]
+        
+    #what a set of shots is worth together, the damage to an enemy can't be more than its rum
+    #and a mine only goes off once, None if two shots go for the same mine
+    def fire_value(self, shots):
+        damage = {}
+        mines = set()
+        value = 0.0
+        for shot in shots:
+            if shot is None:
+                continue
+            v, c, targets, own = shot
+            if c in self.mines_seen:
+                if c in mines:
+                    return None
+                mines.add(c)
+            value -= own
+            for enemy_id, d in targets.items():
+                damage[enemy_id] = damage.get(enemy_id, 0.0) + d
+        for enemy_id, d in damage.items():
+            value += min(d, self.world.entities[enemy_id].rum)
+        return value
+        
+    #let the planner improve on the moves the rules picked, they are where it starts from
+    #ships that fire or lay a mine keep doing that this turn
+    def plan_moves(self, ship_ids):
+        depth = self.planner.depth
+        seeds, fixed, shots = {}, set(), {}
+        hulls = None
+        for ship_id in ship_ids:
+            action = self.action[ship_id]
+            first = steer_index(action)
+            if action is not None and first == 0 and action != "WAIT":
+                fixed.add(ship_id)
+            seed = [first] + [0] * (depth - 1)
+            #after the first move follow the pathfinder's path
+            path = self.pathfinder.paths.get(ship_id)
+            if path is not None and path[2][0] == first:
+                rest = path[2][1:depth]
+                seed[1:1 + len(rest)] = rest
+            seeds[ship_id] = seed
+            
+            #waiting this turn lets us fire
+            if ship_id not in fixed and self.can_shoot(ship_id):
+                if hulls is None:
+                    hulls = self.friendly_hulls(ship_ids)
+                options = self.fire_options(self.world.entities[ship_id], hulls)
+                if options:
+                    shots[ship_id] = options[0][0]
+        
+        #leave the time allocate_fire needs after us
+        deadline = min(self.turn_start + PLAN_TIME, self.clock.deadline - STAGE_TIME["fire"])
+        if self.plan_iterations is not None:
+            deadline = float("inf")
+        choice = self.planner.plan(self.world, ship_ids, seeds, fixed, self.targets, shots, deadline, self.plan_iterations)
+        self.planned = self.planner.iterations
+        for ship_id in ship_ids:
+            if ship_id not in fixed and choice[ship_id] != seeds[ship_id][0]:
+                self.action[ship_id] = SHIP_COMMANDS[choice[ship_id]]
+        
+    #once every ship picked its move, the ones that are free to fire shoot, all shots chosen together
+    #each ship has a few options, with at most 3 ships trying every combination is cheap
+    def allocate_fire(self, ship_ids):
+        shooters = [i for i in ship_ids if self.action[i] in [None, "WAIT"] and self.can_shoot(i)]
+        if not shooters:
+            return
+        hulls = self.friendly_hulls(ship_ids)
+        options = [[None] + self.fire_options(self.world.entities[i], hulls) for i in shooters]
+        best, best_value = None, 0.0
+        for shots in itertools.product(*options):
+            value = self.fire_value(shots)
+            if value is not None and value > best_value:
+                best, best_value = shots, value
+        if best is None:
+            return
+        for ship_id, shot in zip(shooters, best):
+            if shot is not None:
+                c = shot[1]
+                self.action[ship_id] = "FIRE {} {}{}".format(CELL_X[c], CELL_Y[c], " blindside!" if c in self.mines_seen else "")
+
+    #ships that stay on course without firing drop a mine behind them, when an enemy is likely to sail over it
+    #only WAIT keeps the course, a ship with no action has reached its target and is played as SLOWER
+    #the mine goes on the cell behind the stern, it has to be free and out of the way of our own ships
+    def lay_mines(self, ship_ids):
+        hulls = None
+        for ship_id in ship_ids:
+            if self.action[ship_id] != "WAIT" or not self.can_lay(ship_id):
+                continue
+            ship = self.world.entities[ship_id]
+            back = (ship.orient + 3) % 6
+            c = neighbor_cell(ship.cell, back, 2)
+            if c == OFF_MAP or self.world.occupancy[c] & (OCC_SHIP | OCC_MINES | OCC_BARREL):
+                continue
+            if hulls is None:
+                hulls = self.friendly_hulls(ship_ids)
+            if any(c in hull for layer in hulls for hull in layer):
+                continue
+            chances = self.enemies.touch_chances(self.world, c)
+            value = sum(min(p * MINE_DAMAGE, self.world.entities[i].rum) for i, p in chances.items())
+            if value >= MIN_MINE_VALUE:
+                self.action[ship_id] = "MINE"
                 
-                    
-        debug("{}: a:{}, s:{}".format(MY_SHIP_ID, action[MY_SHIP_ID], is_safe_movement(MY_SHIP_ID, action[MY_SHIP_ID])))
+    #plays a turn given as the lines of text the game sends
+    def play_lines(self, lines):
+        return self.step(parse_lines(lines[2:]))
+        
+    #plays a turn given as the parsed entity values, returns one command per ship
+    def step(self, values):
+        self.start_turn()
+        self.turn_start = self.clock.started
+        world = self.world
+        world.load(values)
         
-        if action[MY_SHIP_ID] is None:
-            action[MY_SHIP_ID] = "SLOWER"
+        self.profiler.phase("parse")
+        
+        self.pathfinder.new_turn()
+        self.targets.clear()
+        self.planned = None
             
-        print(action[MY_SHIP_ID])
+    
+        #if we like to see the output
+        #for e in world.entities.values():
+        #    debug(e)
+    
+        MY_SHIP_IDS = [s.id for s in world.my_ships()]
+    
+        #keep track of my ships this frame, and the enemies to learn how they steer
+        self.prev_ship.begin(self.loop_counter)
+        for ship in world.not_my_ships():
+            self.prev_ship.record(ship)
+        self.enemies.observe(world, self.prev_ship)
         
-        #update cooldowns
-        if "FIRE" in action[MY_SHIP_ID]:
-            LAST_CANNONBALL[MY_SHIP_ID] = loop_counter
-        if "MINE" in action[MY_SHIP_ID]:
-            LAST_MINE[MY_SHIP_ID] = loop_counter
+        #safety first, whatever happens later every ship has a command ready
+        self.defaults = dict((i, self.safe_default(i)) for i in MY_SHIP_IDS)
+        self.profiler.phase("safety")
+        
+        for MY_SHIP_ID in MY_SHIP_IDS:
+            #first time, initialize the action variables
+            if self.loop_counter == 0:
+                self.last_cannonball[MY_SHIP_ID] = -10
+                self.last_mine[MY_SHIP_ID] = -10
+                self.action[MY_SHIP_ID] = None
+    
+            if self.action[MY_SHIP_ID] is not None:
+                continue
             
-        prev_action[MY_SHIP_ID] = action[MY_SHIP_ID]
-        prev_ship[loop_counter][MY_SHIP_ID] = MY_SHIP
+            #out of time, the ships left play it safe
+            if not self.clock.allows("movement"):
+                self.action[MY_SHIP_ID] = self.defaults[MY_SHIP_ID]
+                continue
+    
+            MY_SHIP = world.entities[MY_SHIP_ID]
+    
+            near_alli = [x for x in world.by_distance(MY_SHIP_ID, "my_ships") if x.id != MY_SHIP_ID]
+            near_barrels = list(world.by_distance(MY_SHIP_ID, "barrels"))
+            #the closest few by the turns it takes to get there, turning around is slow
+            near_barrels[:BARREL_CANDIDATES] = sorted(near_barrels[:BARREL_CANDIDATES], key=lambda x:
+                move_cost(MY_SHIP, x.x, x.y))
+            near_enemy = world.by_distance(MY_SHIP_ID, "not_my_ships")
+    
+            my_high, your_high = world.max_team_rum()
+    
+            dist_to_enemy = world.distance(MY_SHIP_ID, near_enemy[0].id)
+            if len(near_alli) > 0:
+                dist_to_alli = world.distance(MY_SHIP_ID, near_alli[0].id)
+    
+            #we are hungry
+            if len(near_barrels) > 0 and ( MY_SHIP.rum < HUNGRY_RUM or MY_SHIP.rum < your_high ):
+                self.action[MY_SHIP_ID] = self.move_to_point(MY_SHIP_ID, near_barrels[0].x, near_barrels[0].y)
+    
+            elif len(near_alli) > 0 and len(near_barrels)==0 and MY_SHIP.rum < SHARING_RUM and your_high > my_high and dist_to_alli < dist_to_enemy - SHARING_MARGIN:
+                if MY_SHIP.speed > 0:
+                    self.action[MY_SHIP_ID] = "SLOWER"
+                else:
+                    self.action[MY_SHIP_ID] = "FIRE {} {}".format(MY_SHIP.x, MY_SHIP.y)
         
-        action[MY_SHIP_ID] = None
+                self.action[near_alli[0].id] = self.move_to_point(near_alli[0].id, MY_SHIP.x, MY_SHIP.y)
+            #chase the enemy until it is in range, allocate_fire() decides where we shoot
+            else:
+                enemy = near_enemy[0]
+                enemy_dist = world.distance(MY_SHIP_ID, enemy.id)
+                if enemy_dist > CHASE_DISTANCE:
+                    self.action[MY_SHIP_ID] = self.move_to_point(MY_SHIP_ID, enemy.x, enemy.y)
+        
+    
+            #are we stuck for the last 2 frames?
+            if self.prev_ship.stuck(MY_SHIP, 2):
+                acts = ["PORT", "STARBOARD", "FASTER"]
+                #speeding up doesn't get us out if something is in the way
+                if world.first_ahead(NEIGHBOR_TABLE[MY_SHIP.cell * 6 + MY_SHIP.orient], MY_SHIP.orient, OCC_SHIP | OCC_MINES, MAX_SHIP_SPEED)[0] is not None:
+                    acts.remove("FASTER")
+                acts = [a for a in acts if self.action[MY_SHIP_ID] not in acts and world.is_safe_movement(MY_SHIP_ID, a)]
+        
+                if len(acts) > 0:
+                    self.random.shuffle(acts)
+                    self.action[MY_SHIP_ID] = acts[0]
+                else:
+                    self.action[MY_SHIP_ID] = self.random.choice(["PORT", "STARBOARD"])
+    
+        self.profiler.phase("decide")
+        
+        #fire goes before search, but needs the moves it plans, so search runs first and stops in time
+        if self.planner is not None and self.clock.allows("search"):
+            self.plan_moves(MY_SHIP_IDS)
+            self.profiler.phase("plan")
+        
+        #override waiting with cannonball shots, and mines for the ships that don't shoot
+        if self.clock.allows("fire"):
+            self.allocate_fire(MY_SHIP_IDS)
+            self.lay_mines(MY_SHIP_IDS)
+        self.profiler.phase("fire")
+    
+        #write out the actions for each ship
+        debug(" --- ")
+        commands = []
+        safety = world.safety_matrix()
+        for MY_SHIP_ID in MY_SHIP_IDS:
+            MY_SHIP = world.entities[MY_SHIP_ID]
+            damage = safety[MY_SHIP_ID]
+    
+            debug("{}: i:{}, d:{}".format(MY_SHIP_ID, self.action[MY_SHIP_ID], damage[steer_index(self.action[MY_SHIP_ID])]))
+    
+            if damage[steer_index(self.action[MY_SHIP_ID])] > 0:
+                acts = ["PORT", "STARBOARD", "FASTER", "SLOWER", "WAIT"]
+                if MY_SHIP.speed == 2:
+                    acts.remove("FASTER")
+                if MY_SHIP.speed == 0:
+                    acts.remove("SLOWER")
+            
+                safe = [a for a in acts if damage[steer_index(a)] == 0]
+                debug("{}: safe:{}".format(MY_SHIP_ID, safe))
+                if len(safe) == 0:
+                    #nothing is safe, take the least bad move
+                    self.action[MY_SHIP_ID] = self.defaults[MY_SHIP_ID]
+                else:
+                    self.action[MY_SHIP_ID] = self.random.choice(safe)
             
-    loop_counter += 1
\ No newline at end of file
+                
+            debug("{}: a:{}, d:{}".format(MY_SHIP_ID, self.action[MY_SHIP_ID], damage[steer_index(self.action[MY_SHIP_ID])]))
+    
+            if self.action[MY_SHIP_ID] is None:
+                self.action[MY_SHIP_ID] = "SLOWER"
+            self.profiler.phase("check")
+        
+            commands.append(self.action[MY_SHIP_ID])
+    
+            #update cooldowns
+            if "FIRE" in self.action[MY_SHIP_ID]:
+                self.last_cannonball[MY_SHIP_ID] = self.loop_counter
+            if "MINE" in self.action[MY_SHIP_ID]:
+                self.last_mine[MY_SHIP_ID] = self.loop_counter
+        
+            self.prev_action[MY_SHIP_ID] = self.action[MY_SHIP_ID]
+            self.prev_ship.record(MY_SHIP)
+    
+            self.action[MY_SHIP_ID] = None
+            self.profiler.phase("output")
+    
+        self.profiler.end_turn(self.loop_counter)
+        self.clock.end_turn(self.loop_counter)
+        self.loop_counter += 1
+        return commands
+
+#how much of the log is kept in memory before it goes to the file
+RECORD_BUFFER = 1 << 16
+
+#writes a game to a log that replay.py can play back, turned on with --record <path> or PIRATE_RECORD=<path>
+#one json object per line: first what the bot was started with, then per turn what came in and what went out
+#a turn is written once its commands are out, into a buffer that goes to disk when it fills up or the game ends
+class Recorder:
+    def __init__(self, path, seed, plan=True):
+        if os.path.isdir(path):
+            path = os.path.join(path, "{}-{}.log".format(time.strftime("%Y%m%d-%H%M%S"), os.getpid()))
+        self.path = path
+        self.file = open(path, "w", buffering=RECORD_BUFFER)
+        self.write({"seed": seed, "plan": plan, "budget": TURN_BUDGET, "first_budget": FIRST_TURN_BUDGET, "params": current_params()})
+        
+    def write(self, record):
+        self.file.write(json.dumps(record, separators=(",", ":")))
+        self.file.write("\n")
+        
+    #the input and commands of the turn the bot just played and what it remembers after it
+    #called once the commands are out, so the time it takes isn't part of the turn
+    def turn(self, bot, my_ship_count, values, commands):
+        self.write({"turn": bot.loop_counter - 1, "ships": my_ship_count, "values": values})
+        self.write({
+            "turn": bot.loop_counter - 1,
+            "commands": commands,
+            "ms": round(bot.clock.elapsed * 1000, 3),
+            "checks": "".join(bot.clock.checks),
+            "iterations": bot.planned,
+            "mines": sorted(bot.mines_seen.mines),
+            "prev_action": bot.prev_action,
+            "cooldowns": dict((i, [bot.last_cannonball[i], bot.last_mine[i]]) for i in bot.last_cannonball),
+        })
+        
+    def close(self):
+        self.file.close()
+
+#the log path given with --record or PIRATE_RECORD, None when there is none
+def record_path(argv):
+    if "--record" in argv:
+        return argv[argv.index("--record") + 1]
+    return os.environ.get("PIRATE_RECORD") or None
+
+# game loop
+if __name__ == "__main__":
+    if "--params" in sys.argv:
+        load_params(sys.argv[sys.argv.index("--params") + 1])
+    
+    #a recorded game needs a known seed to be played back, --seed makes the bot play the same every time
+    path = record_path(sys.argv)
+    if "--seed" in sys.argv:
+        seed = int(sys.argv[sys.argv.index("--seed") + 1])
+    else:
+        seed = random.randrange(1 << 32) if path else None
+    bot = Bot(seed=seed, profile="--profile" in sys.argv or bool(os.environ.get("PIRATE_PROFILE")))
+    recorder = Recorder(path, seed) if path else None
+    while True:
+        turn = read_turn(sys.stdin.buffer, bot.start_turn)
+        if turn is None:
+            bot.profiler.summary()
+            bot.clock.summary()
+            if recorder is not None:
+                recorder.close()
+            break
+        my_ship_count, values = turn
+        commands = bot.step(values)
+        for command in commands:
+            print(command)
+        sys.stdout.flush()
+        if recorder is not None:
+            recorder.turn(bot, my_ship_count, values, commands)
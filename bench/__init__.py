@@ -0,0 +1,160 @@
+import io
+import os
+import time
+import random
+import contextlib
+
+import Pirate
+from state import GameState
+
+#micro benchmarks of the hot helpers in Pirate.py, run over the recorded game states in corpus/
+#every benchmark times one op at a time, so the numbers are ops/sec and can be compared across commits
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CORPUS = os.path.join(HERE, "corpus")
+BASELINE = os.path.join(HERE, "baseline.json")
+#planner iterations in one op of the plan benchmark
+BENCH_PLAN_ITERATIONS = 200
+
+#name -> raw bytes of the turn
+def load_corpus():
+    corpus = {}
+    for name in sorted(os.listdir(CORPUS)):
+        if name.endswith(".txt"):
+            with open(os.path.join(CORPUS, name), "rb") as f:
+                corpus[name[:-4]] = f.read()
+    return corpus
+
+#parse a turn and load it into a fresh world
+def load(data, world=None):
+    my_ship_count, values = Pirate.read_turn(io.BytesIO(data))
+    if world is None:
+        world = Pirate.World()
+    world.load(values)
+    return world
+
+#each benchmark takes the raw turn, loads it and returns (fn, [args]), one op is one call of fn
+def bench_parse(data):
+    world = Pirate.World()
+    return (load, [(data, world)])
+
+#a whole turn of a new bot, like the first turn of a game
+#without the planner, it runs until its deadline whatever the state
+def bench_turn(data):
+    my_ship_count, values = Pirate.read_turn(io.BytesIO(data))
+    def turn():
+        Pirate.Bot(seed=0, plan=False).step(values)
+    return (turn, [()])
+
+def targets(world):
+    return [(t.x, t.y) for t in world.barrels() + world.not_my_ships()]
+
+def bench_move_to_point(data):
+    world = load(data)
+    return (world.move_to_point, [(s.id, x, y) for s in world.my_ships() for x, y in targets(world)])
+
+#a bot that has loaded the turn, with the enemies observed, the way step() has it when it decides
+def load_bot(data):
+    my_ship_count, values = Pirate.read_turn(io.BytesIO(data))
+    bot = Pirate.Bot(seed=0, plan=False)
+    bot.world.load(values)
+    bot.enemies.observe(bot.world, bot.prev_ship)
+    bot.action = dict((s.id, "WAIT") for s in bot.world.my_ships())
+    return bot
+
+#the damage of every command for a ship, the answers are kept for the rest of the turn
+#so every op starts over and the evaluator itself is timed
+def bench_safety_row(data):
+    world = load(data)
+    def safety_row(id):
+        world.safety.clear()
+        world.ahead.clear()
+        return world.safety_row(id)
+    return (safety_row, [(s.id,) for s in world.my_ships()])
+
+#the predicted enemy states and where a cannonball would hurt them, built once a turn
+def bench_enemy_hits(data):
+    bot = load_bot(data)
+    world = bot.world
+    def enemy_hits():
+        bot.enemies.observe(world, bot.prev_ship)
+        return bot.enemies.hits(world)
+    return (enemy_hits, [()])
+
+#the best shots of each ship, on the enemy predictions of the turn
+def bench_fire_options(data):
+    bot = load_bot(data)
+    ids = [s.id for s in bot.world.my_ships()]
+    hulls = bot.friendly_hulls(ids)
+    return (bot.fire_options, [(bot.world.entities[i], hulls) for i in ids])
+
+#an A* search from every ship to every barrel and enemy, each with a full node budget
+def bench_pathfinder_search(data):
+    world = load(data)
+    pathfinder = Pirate.Pathfinder()
+    def search(ship, tc):
+        pathfinder.new_turn()
+        start = Pirate.ship_state(ship.cell, ship.orient, ship.speed)
+        return pathfinder.search(world, ship, start, tc, world.ship_at[tc])
+    return (search, [(s, t.cell) for s in world.my_ships() for t in world.barrels() + world.not_my_ships()])
+
+#a fixed number of planner iterations over our ships' joint moves, waiting as the seed plan
+def bench_plan(data):
+    world = load(data)
+    ids = [s.id for s in world.my_ships()]
+    seeds = dict((i, [0] * Pirate.PLAN_DEPTH) for i in ids)
+    targets = dict((s.id, world.barrels()[0].cell) for s in world.my_ships() if world.barrels())
+    def plan():
+        planner = Pirate.Planner(random.Random(0))
+        return planner.plan(world, ids, seeds, set(), targets, {}, float("inf"), BENCH_PLAN_ITERATIONS)
+    return (plan, [()])
+
+#one simulated turn on a copy of the state and back again, every ship trying every steering command
+def bench_state_apply(data):
+    game = GameState.from_world(load(data))
+    def apply_undo(codes):
+        game.apply(codes, True)
+        game.undo()
+    return (apply_undo, [([k] * len(game.cell),) for k in range(len(Pirate.SHIP_COMMANDS))])
+
+BENCHMARKS = [
+    ("parse", bench_parse),
+    ("turn", bench_turn),
+    ("move_to_point", bench_move_to_point),
+    ("safety_row", bench_safety_row),
+    ("enemy_hits", bench_enemy_hits),
+    ("fire_options", bench_fire_options),
+    ("pathfinder_search", bench_pathfinder_search),
+    ("plan", bench_plan),
+    ("state_apply", bench_state_apply),
+]
+
+#best ops/sec of a few repeats, each repeat runs for at least min_time seconds
+def measure(fn, calls, min_time=0.2, repeats=3):
+    best = 0.0
+    for r in range(repeats):
+        ops = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < min_time:
+            for args in calls:
+                fn(*args)
+            ops += len(calls)
+            elapsed = time.perf_counter() - start
+        best = max(best, ops / elapsed)
+    return best
+
+#runs every benchmark on every state, returns {"state/benchmark": ops/sec}
+def run(only=None, min_time=0.2, repeats=3):
+    results = {}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stderr(devnull):
+        for state, data in load_corpus().items():
+            for name, setup in BENCHMARKS:
+                key = "{}/{}".format(state, name)
+                if only is not None and not any(o in key for o in only):
+                    continue
+                fn, calls = setup(data)
+                if not calls:
+                    continue
+                results[key] = measure(fn, calls, min_time, repeats)
+    return results
@@ -0,0 +1,48 @@
+import sys
+import json
+import argparse
+
+import bench
+
+#   python -m bench                 run everything and print ops/sec
+#   python -m bench --save          also store the numbers as the baseline
+#   python -m bench --check         fail if anything got slower than the baseline by more than --tolerance
+
+parser = argparse.ArgumentParser(prog="python -m bench", description="benchmark the hot helpers of Pirate.py")
+parser.add_argument("only", nargs="*", help="only run benchmarks whose state/name contains one of these")
+parser.add_argument("--min-time", type=float, default=0.2, help="seconds per repeat")
+parser.add_argument("--repeats", type=int, default=3)
+parser.add_argument("--baseline", default=bench.BASELINE, help="baseline file (default: bench/baseline.json)")
+parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+parser.add_argument("--check", action="store_true", help="compare against the baseline and exit 1 on a regression")
+parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before --check fails (default: 0.2 = 20%%)")
+args = parser.parse_args()
+
+results = bench.run(args.only or None, args.min_time, args.repeats)
+
+baseline = {}
+if args.check:
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except IOError:
+        sys.exit("no baseline at {}, make one with --save".format(args.baseline))
+
+regressions = []
+for key, ops in sorted(results.items()):
+    line = "{:50} {:>12,.0f} ops/sec".format(key, ops)
+    if key in baseline:
+        change = ops / baseline[key] - 1
+        line += "  {:+6.1%}".format(change)
+        if change < -args.tolerance:
+            line += "  SLOWER"
+            regressions.append(key)
+    print(line)
+
+if args.save:
+    with open(args.baseline, "w") as f:
+        json.dump(results, f, indent=1, sort_keys=True)
+    print("saved the baseline to {}".format(args.baseline))
+
+if regressions:
+    sys.exit("{} benchmarks are more than {:.0%} slower than the baseline".format(len(regressions), args.tolerance))
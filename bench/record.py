@@ -0,0 +1,45 @@
+import os
+import sys
+
+import engine
+
+#records the corpus of game states the benchmarks run on, by playing local games of Pirate.py against itself
+#every state is saved as the exact lines player 0 reads at the start of that turn
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CORPUS = os.path.join(HERE, "corpus")
+BOT = os.path.join(os.path.dirname(HERE), "Pirate.py")
+
+#plays one game and returns [(turn, lines)] for every turn player 0 still has ships
+def record_game(seed, timeout=1.0):
+    states = [(0, engine.Game(seed).player_input(0))]
+    def on_turn(game, commands):
+        if game.player_ships(0) and not game.is_over():
+            states.append((game.turn, game.player_input(0)))
+    players = [engine.ProcessPlayer(engine.python_bot(BOT), timeout, timeout) for i in range(2)]
+    engine.play_match(players, seed, on_turn=on_turn)
+    return states
+
+def count(lines, kind):
+    return sum(1 for line in lines[2:] if line.split()[1] == kind)
+
+#picks the states for each part of the corpus out of a few games
+def pick_states(games):
+    everything = [(seed, turn, lines) for seed, states in games for turn, lines in states]
+    longest = max(games, key=lambda g: len(g[1]))
+    picks = {}
+    picks["early"] = min(everything, key=lambda s: (abs(s[1] - 3), s[0]))
+    picks["mid"] = min(everything, key=lambda s: (abs(s[1] - 60), s[0]))
+    picks["late"] = (longest[0],) + longest[1][-1]
+    picks["mines"] = max(everything, key=lambda s: (count(s[2], "MINE"), -s[0]))
+    picks["cannonballs"] = max(everything, key=lambda s: (count(s[2], "CANNONBALL"), -s[0]))
+    return picks
+
+if __name__ == "__main__":
+    seeds = range(1, 1 + (int(sys.argv[1]) if len(sys.argv) > 1 else 10))
+    games = [(seed, record_game(seed)) for seed in seeds]
+    for name, (seed, turn, lines) in sorted(pick_states(games).items()):
+        path = os.path.join(CORPUS, name + ".txt")
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        print("{}: seed {} turn {}, {} entities -> {}".format(name, seed, turn, lines[1], os.path.relpath(path)))
@@ -0,0 +1,645 @@
+import os
+import re
+import sys
+import copy
+import math
+import queue
+import random
+import threading
+import subprocess
+import time
+
+#local referee for the Coders of the Caribbean rules
+#plays two bots against each other over the same stdin/stdout protocol as the arena,
+#and Game can also be imported on its own as a forward model of the game
+
+#the rules of the game
+MAP_WIDTH = 23
+MAP_HEIGHT = 21
+DIRECTIONS_EVEN = [[1,0],[0,-1],[-1,-1],[-1,0],[-1,1],[0,1]]
+DIRECTIONS_ODD = [[1,0],[1,-1],[0,-1],[-1,0],[0,1],[1,1]]
+MAX_TURNS = 200
+COOLDOWN_CANNON = 2
+COOLDOWN_MINE = 5
+INITIAL_SHIP_HEALTH = 100
+MAX_SHIP_HEALTH = 100
+MAX_SHIP_SPEED = 2
+MIN_SHIPS = 1
+MAX_SHIPS = 3
+MIN_MINES = 5
+MAX_MINES = 10
+MIN_RUM_BARRELS = 10
+MAX_RUM_BARRELS = 26
+MIN_RUM_BARREL_VALUE = 10
+MAX_RUM_BARREL_VALUE = 20
+REWARD_RUM_BARREL_VALUE = 30
+MINE_VISIBILITY_RANGE = 5
+FIRE_DISTANCE_MAX = 10
+LOW_DAMAGE = 25
+HIGH_DAMAGE = 50
+MINE_DAMAGE = 25
+NEAR_MINE_DAMAGE = 10
+
+#time the arena gives a bot to answer, in seconds
+FIRST_TURN_TIMEOUT = 1.0
+TURN_TIMEOUT = 0.05
+
+#the commands a ship understands, anything after them is a message
+COMMAND_RE = re.compile(r"^(?:(?P<move>MOVE)\s+(?P<mx>-?\d{1,8})\s+(?P<my>-?\d{1,8})"
+                        r"|(?P<fire>FIRE)\s+(?P<fx>-?\d{1,8})\s+(?P<fy>-?\d{1,8})"
+                        r"|(?P<cmd>SLOWER|FASTER|WAIT|PORT|STARBOARD|MINE))(?:\s+.*)?$", re.IGNORECASE)
+
+#the next cell in direction d from (x, y)
+def neighbor(x, y, d):
+    if y%2 == 1:
+        return (x + DIRECTIONS_ODD[d][0], y + DIRECTIONS_ODD[d][1])
+    else:
+        return (x + DIRECTIONS_EVEN[d][0], y + DIRECTIONS_EVEN[d][1])
+
+#determines whether or not (x, y) is inside the map
+def is_inside_map(p):
+    return 0 <= p[0] < MAP_WIDTH and 0 <= p[1] < MAP_HEIGHT
+
+#distance between two points on the hex grid
+def dist(a, b):
+    xp1 = a[0] - (a[1] - (a[1] & 1)) // 2
+    zp1 = a[1]
+    yp1 = -(xp1 + zp1)
+    xp2 = b[0] - (b[1] - (b[1] & 1)) // 2
+    zp2 = b[1]
+    yp2 = -(xp2 + zp2)
+    return (abs(xp1 - xp2) + abs(yp1 - yp2) + abs(zp1 - zp2)) // 2
+
+#angle between two points [0-6)
+def angle(a, b):
+    dy = (b[1] - a[1]) * math.sqrt(3) / 2
+    dx = b[0] - a[0] + ((a[1] - b[1]) & 1) * 0.5
+    ang = -math.atan2(dy, dx) * 3 / math.pi
+    if ang < 0:
+        ang += 6
+    elif ang >= 6:
+        ang -= 6
+    return ang
+
+class Ship:
+    def __init__(self, id, owner, pos, orient):
+        self.id = id
+        self.owner = owner
+        self.pos = pos
+        self.orient = orient
+        self.speed = 0
+        self.health = INITIAL_SHIP_HEALTH
+        self.initial_health = INITIAL_SHIP_HEALTH
+        self.cannon_cooldown = 0
+        self.mine_cooldown = 0
+        self.action = None
+        self.target = None
+        self.new_orient = orient
+        self.new_pos = pos
+        self.new_bow = self.bow()
+        self.new_stern = self.stern()
+
+    def bow(self):
+        return neighbor(self.pos[0], self.pos[1], self.orient)
+
+    def stern(self):
+        return neighbor(self.pos[0], self.pos[1], (self.orient + 3) % 6)
+
+    def cells(self):
+        return (self.bow(), self.pos, self.stern())
+
+    def at(self, p):
+        return p == self.pos or p == self.bow() or p == self.stern()
+
+    def damage(self, amount):
+        self.health = max(0, self.health - amount)
+
+    def heal(self, amount):
+        self.health = min(MAX_SHIP_HEALTH, self.health + amount)
+
+    def new_bow_intersects(self, ships):
+        return any(s is not self and self.new_bow in (s.new_bow, s.new_pos, s.new_stern) for s in ships)
+
+    def new_positions_intersect(self, ships):
+        mine = (self.new_bow, self.new_pos, self.new_stern)
+        return any(s is not self and any(c in mine for c in (s.new_bow, s.new_pos, s.new_stern)) for s in ships)
+
+    #the autopilot behind the MOVE command, the same one the arena uses
+    def move_to(self, target):
+        pos = self.pos
+        if pos == target:
+            self.action = "SLOWER"
+            return
+        o = self.orient
+        if self.speed == 2:
+            self.action = "SLOWER"
+        elif self.speed == 1:
+            #suppose we've moved first
+            pos = neighbor(pos[0], pos[1], o)
+            if not is_inside_map(pos):
+                self.action = "SLOWER"
+                return
+            if pos == target:
+                self.action = None
+                return
+            straight, port, starboard, port_center, starboard_center = turn_angles(pos, target, o)
+            #next to the target with a bad angle, slow down then rotate
+            if dist(pos, target) == 1 and straight > 1.5:
+                self.action = "SLOWER"
+                return
+            distance_min = None
+            nxt = neighbor(pos[0], pos[1], o)
+            if is_inside_map(nxt):
+                distance_min = dist(nxt, target)
+                self.action = None
+            nxt = neighbor(pos[0], pos[1], (o + 1) % 6)
+            if is_inside_map(nxt):
+                d = dist(nxt, target)
+                if distance_min is None or d < distance_min or d == distance_min and port < straight - 0.5:
+                    distance_min = d
+                    self.action = "PORT"
+            nxt = neighbor(pos[0], pos[1], (o + 5) % 6)
+            if is_inside_map(nxt):
+                d = dist(nxt, target)
+                if (distance_min is None or d < distance_min
+                        or d == distance_min and starboard < port - 0.5 and self.action == "PORT"
+                        or d == distance_min and starboard < straight - 0.5 and self.action is None
+                        or d == distance_min and self.action == "PORT" and starboard == port and starboard_center < port_center
+                        or d == distance_min and self.action == "PORT" and starboard == port and starboard_center == port_center and o in (1, 4)):
+                    self.action = "STARBOARD"
+        else:
+            straight, port, starboard, port_center, starboard_center = turn_angles(pos, target, o)
+            forward = neighbor(pos[0], pos[1], o)
+            self.action = None
+            if port <= starboard:
+                self.action = "PORT"
+            if (starboard < port or starboard == port and starboard_center < port_center
+                    or starboard == port and starboard_center == port_center and o in (1, 4)):
+                self.action = "STARBOARD"
+            if is_inside_map(forward) and straight <= port and straight <= starboard:
+                self.action = "FASTER"
+
+#how far off the target each of the three headings is, used by the autopilot
+def turn_angles(pos, target, o):
+    ta = angle(pos, target)
+    ca = angle(pos, (MAP_WIDTH // 2, MAP_HEIGHT // 2))
+    straight = min(abs(o - ta), 6 - abs(o - ta))
+    port = min(abs((o + 1) - ta), abs((o - 5) - ta))
+    starboard = min(abs((o + 5) - ta), abs((o - 1) - ta))
+    port_center = min(abs((o + 1) - ca), abs((o - 5) - ca))
+    starboard_center = min(abs((o + 5) - ca), abs((o - 1) - ca))
+    return (straight, port, starboard, port_center, starboard_center)
+
+class Barrel:
+    def __init__(self, id, pos, rum):
+        self.id = id
+        self.pos = pos
+        self.rum = rum
+
+class Mine:
+    def __init__(self, id, pos):
+        self.id = id
+        self.pos = pos
+
+    #damage the ships around the mine, returns true if it went off
+    def explode(self, ships, force):
+        victim = None
+        for ship in ships:
+            if ship.at(self.pos):
+                ship.damage(MINE_DAMAGE)
+                victim = ship
+        if not force and victim is None:
+            return False
+        for ship in ships:
+            if ship is not victim and any(dist(c, self.pos) <= 1 for c in ship.cells()):
+                ship.damage(NEAR_MINE_DAMAGE)
+        return True
+
+class Cannonball:
+    def __init__(self, id, pos, owner, time):
+        self.id = id
+        self.pos = pos
+        self.owner = owner
+        self.time = time
+
+class Game:
+    def __init__(self, seed=None, ship_count=None, mine_count=None, barrel_count=None):
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.next_id = 0
+        self.turn = 0
+        self.ships = []
+        self.barrels = []
+        self.mines = []
+        self.cannonballs = []
+        self.explosions = []
+        #players that are out of the game, e.g. for a timeout, with the reason
+        self.lost = {}
+        self.init_ships(ship_count)
+        self.init_mines(mine_count)
+        self.init_barrels(barrel_count)
+
+    def new_id(self):
+        self.next_id += 1
+        return self.next_id - 1
+
+    #each player gets the same ships, mirrored across the middle row
+    def init_ships(self, count):
+        rnd = self.random
+        if count is None:
+            count = rnd.randint(MIN_SHIPS, MAX_SHIPS)
+        for i in range(count):
+            while True:
+                p = (rnd.randint(1, MAP_WIDTH // 2), rnd.randint(1, MAP_HEIGHT // 2 - 1))
+                m = (p[0], MAP_HEIGHT - 1 - p[1])
+                if all(dist(p, s.pos) >= 3 and dist(m, s.pos) >= 3 for s in self.ships) and dist(p, m) >= 3:
+                    break
+            o = rnd.randint(0, 5)
+            self.ships.append(Ship(self.new_id(), 0, p, o))
+            self.ships.append(Ship(self.new_id(), 1, m, (6 - o) % 6))
+
+    def init_mines(self, count):
+        rnd = self.random
+        if count is None:
+            count = rnd.randint(MIN_MINES, MAX_MINES)
+        for i in range(count):
+            p = (rnd.randint(1, MAP_WIDTH - 2), rnd.randint(1, MAP_HEIGHT // 2))
+            m = (p[0], MAP_HEIGHT - 1 - p[1])
+            if any(dist(p, s.pos) <= 2 or dist(m, s.pos) <= 2 for s in self.ships):
+                continue
+            if any(x.pos in (p, m) for x in self.mines):
+                continue
+            self.mines.append(Mine(self.new_id(), p))
+            if m != p:
+                self.mines.append(Mine(self.new_id(), m))
+
+    def init_barrels(self, count):
+        rnd = self.random
+        if count is None:
+            count = rnd.randint(MIN_RUM_BARRELS, MAX_RUM_BARRELS)
+        tries = 0
+        while len(self.barrels) < count and tries < 1000:
+            tries += 1
+            p = (rnd.randint(1, MAP_WIDTH - 2), rnd.randint(1, MAP_HEIGHT // 2))
+            m = (p[0], MAP_HEIGHT - 1 - p[1])
+            rum = rnd.randint(MIN_RUM_BARREL_VALUE, MAX_RUM_BARREL_VALUE)
+            if any(s.at(p) or s.at(m) for s in self.ships):
+                continue
+            if any(x.pos in (p, m) for x in self.mines + self.barrels):
+                continue
+            self.barrels.append(Barrel(self.new_id(), p, rum))
+            if m != p:
+                self.barrels.append(Barrel(self.new_id(), m, rum))
+
+    def clone(self):
+        return copy.deepcopy(self)
+
+    def player_ships(self, player):
+        return [s for s in self.ships if s.owner == player]
+
+    def rum(self, player):
+        return sum(s.health for s in self.player_ships(player))
+
+    #the lines a player reads at the start of a turn
+    def player_input(self, player):
+        mine = self.player_ships(player)
+        lines = []
+        for s in mine + self.player_ships(1 - player):
+            lines.append("{} SHIP {} {} {} {} {} {}".format(s.id, s.pos[0], s.pos[1], s.orient, s.speed, s.health, 1 if s.owner == player else 0))
+        for m in self.mines:
+            if any(dist(s.pos, m.pos) <= MINE_VISIBILITY_RANGE for s in mine):
+                lines.append("{} MINE {} {} 0 0 0 0".format(m.id, m.pos[0], m.pos[1]))
+        for b in self.cannonballs:
+            lines.append("{} CANNONBALL {} {} {} {} 0 0".format(b.id, b.pos[0], b.pos[1], b.owner, b.time))
+        for b in self.barrels:
+            lines.append("{} BARREL {} {} {} 0 0 0".format(b.id, b.pos[0], b.pos[1], b.rum))
+        return [str(len(mine)), str(len(lines))] + lines
+
+    #gives the ships of a player their commands, one line per ship in input order
+    #returns an error message if the commands are not valid
+    def set_commands(self, player, commands):
+        ships = self.player_ships(player)
+        if len(commands) < len(ships):
+            return "expected {} commands, got {}".format(len(ships), len(commands))
+        for ship, line in zip(ships, commands):
+            match = COMMAND_RE.match(line.strip())
+            if match is None:
+                return "invalid command: {!r}".format(line)
+            ship.action = None
+            ship.target = None
+            if match.group("move"):
+                ship.move_to((int(match.group("mx")), int(match.group("my"))))
+            elif match.group("fire"):
+                ship.action = "FIRE"
+                ship.target = (int(match.group("fx")), int(match.group("fy")))
+            else:
+                cmd = match.group("cmd").upper()
+                ship.action = None if cmd == "WAIT" else cmd
+        return None
+
+    #plays out one turn, the commands are a list of lines for each player
+    def step(self, commands=None):
+        if commands is not None:
+            for player, lines in enumerate(commands):
+                error = self.set_commands(player, lines)
+                if error is not None:
+                    self.lost[player] = error
+        if self.is_over():
+            return
+        self.move_cannonballs()
+        for ship in self.ships:
+            ship.damage(1)
+            ship.initial_health = ship.health
+        self.apply_actions()
+        self.move_ships()
+        self.rotate_ships()
+        self.explode_ships()
+        self.explode_mines()
+        self.explode_barrels()
+        #sunk ships leave a barrel with the rum they had at the start of the turn
+        for ship in self.ships:
+            if ship.health <= 0:
+                reward = min(REWARD_RUM_BARREL_VALUE, ship.initial_health)
+                if reward > 0:
+                    self.barrels.append(Barrel(self.new_id(), ship.pos, reward))
+        self.ships = [s for s in self.ships if s.health > 0]
+        self.turn += 1
+
+    def move_cannonballs(self):
+        self.explosions = []
+        for ball in list(self.cannonballs):
+            if ball.time == 0:
+                self.cannonballs.remove(ball)
+                continue
+            ball.time -= 1
+            if ball.time == 0:
+                self.explosions.append(ball.pos)
+
+    def apply_actions(self):
+        for ship in self.ships:
+            if ship.mine_cooldown > 0:
+                ship.mine_cooldown -= 1
+            if ship.cannon_cooldown > 0:
+                ship.cannon_cooldown -= 1
+            ship.new_orient = ship.orient
+            if ship.action == "FASTER":
+                if ship.speed < MAX_SHIP_SPEED:
+                    ship.speed += 1
+            elif ship.action == "SLOWER":
+                if ship.speed > 0:
+                    ship.speed -= 1
+            elif ship.action == "PORT":
+                ship.new_orient = (ship.orient + 1) % 6
+            elif ship.action == "STARBOARD":
+                ship.new_orient = (ship.orient + 5) % 6
+            elif ship.action == "MINE":
+                if ship.mine_cooldown == 0:
+                    stern = ship.stern()
+                    target = neighbor(stern[0], stern[1], (ship.orient + 3) % 6)
+                    if is_inside_map(target):
+                        free = not any(b.pos == target for b in self.barrels)
+                        free = free and not any(m.pos == target for m in self.mines)
+                        free = free and not any(s is not ship and s.at(target) for s in self.ships)
+                        if free:
+                            ship.mine_cooldown = COOLDOWN_MINE
+                            self.mines.append(Mine(self.new_id(), target))
+            elif ship.action == "FIRE":
+                bow = ship.bow()
+                if is_inside_map(ship.target) and dist(bow, ship.target) <= FIRE_DISTANCE_MAX and ship.cannon_cooldown == 0:
+                    travel = 1 + int(math.floor(dist(bow, ship.target) / 3.0 + 0.5))
+                    self.cannonballs.append(Cannonball(self.new_id(), ship.target, ship.id, travel))
+                    ship.cannon_cooldown = COOLDOWN_CANNON
+
+    def move_ships(self):
+        for i in range(1, MAX_SHIP_SPEED + 1):
+            for ship in self.ships:
+                ship.new_pos = ship.pos
+                ship.new_bow = ship.bow()
+                ship.new_stern = ship.stern()
+                if i > ship.speed:
+                    continue
+                nxt = neighbor(ship.pos[0], ship.pos[1], ship.orient)
+                if is_inside_map(nxt):
+                    ship.new_pos = nxt
+                    ship.new_bow = neighbor(nxt[0], nxt[1], ship.orient)
+                    ship.new_stern = neighbor(nxt[0], nxt[1], (ship.orient + 3) % 6)
+                else:
+                    #stop ship!
+                    ship.speed = 0
+            #ships that run into each other go back and stop
+            while True:
+                collisions = [s for s in self.ships if s.new_bow_intersects(self.ships)]
+                if not collisions:
+                    break
+                for ship in collisions:
+                    ship.new_pos = ship.pos
+                    ship.new_bow = ship.bow()
+                    ship.new_stern = ship.stern()
+                    ship.speed = 0
+            for ship in self.ships:
+                ship.pos = ship.new_pos
+            self.check_collisions()
+
+    def rotate_ships(self):
+        for ship in self.ships:
+            ship.new_pos = ship.pos
+            ship.new_bow = neighbor(ship.pos[0], ship.pos[1], ship.new_orient)
+            ship.new_stern = neighbor(ship.pos[0], ship.pos[1], (ship.new_orient + 3) % 6)
+        while True:
+            collisions = [s for s in self.ships if s.new_positions_intersect(self.ships)]
+            if not collisions:
+                break
+            for ship in collisions:
+                ship.new_orient = ship.orient
+                ship.new_bow = ship.bow()
+                ship.new_stern = ship.stern()
+                ship.speed = 0
+        for ship in self.ships:
+            ship.orient = ship.new_orient
+        self.check_collisions()
+
+    def check_collisions(self):
+        for ship in self.ships:
+            for barrel in list(self.barrels):
+                if ship.at(barrel.pos):
+                    ship.heal(barrel.rum)
+                    self.barrels.remove(barrel)
+        for mine in list(self.mines):
+            if mine.explode(self.ships, False):
+                self.mines.remove(mine)
+
+    def explode_ships(self):
+        for pos in list(self.explosions):
+            for ship in self.ships:
+                if pos == ship.bow() or pos == ship.stern():
+                    ship.damage(LOW_DAMAGE)
+                    self.explosions.remove(pos)
+                    break
+                elif pos == ship.pos:
+                    ship.damage(HIGH_DAMAGE)
+                    self.explosions.remove(pos)
+                    break
+
+    def explode_mines(self):
+        for pos in list(self.explosions):
+            for mine in self.mines:
+                if mine.pos == pos:
+                    mine.explode(self.ships, True)
+                    self.mines.remove(mine)
+                    self.explosions.remove(pos)
+                    break
+
+    def explode_barrels(self):
+        for pos in list(self.explosions):
+            for barrel in self.barrels:
+                if barrel.pos == pos:
+                    self.barrels.remove(barrel)
+                    self.explosions.remove(pos)
+                    break
+
+    def is_over(self):
+        if self.lost:
+            return True
+        if not self.player_ships(0) or not self.player_ships(1):
+            return True
+        return self.turn >= MAX_TURNS
+
+    #0 or 1 for the winning player, None for a draw
+    def winner(self):
+        if len(self.lost) == 1:
+            return 1 - list(self.lost)[0]
+        if self.lost:
+            return None
+        alive = [bool(self.player_ships(p)) for p in (0, 1)]
+        if alive[0] != alive[1]:
+            return 0 if alive[0] else 1
+        rum = (self.rum(0), self.rum(1))
+        if rum[0] == rum[1]:
+            return None
+        return 0 if rum[0] > rum[1] else 1
+
+#a player that is a separate program talking over stdin/stdout
+class ProcessPlayer:
+    def __init__(self, cmd, first_timeout=FIRST_TURN_TIMEOUT, timeout=TURN_TIMEOUT, stderr=None):
+        self.cmd = cmd
+        self.first_timeout = first_timeout
+        self.timeout = timeout
+        self.stderr = stderr
+        self.proc = None
+        self.lines = queue.Queue()
+        self.turns = 0
+
+    def start(self):
+        self.proc = subprocess.Popen(self.cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     stderr=self.stderr if self.stderr is not None else subprocess.DEVNULL,
+                                     universal_newlines=True, bufsize=1)
+        reader = threading.Thread(target=self.read_lines, daemon=True)
+        reader.start()
+
+    def read_lines(self):
+        for line in self.proc.stdout:
+            self.lines.put(line)
+        self.lines.put(None)
+
+    #send the turn and wait for one line per ship, raises TimeoutError if the bot is too slow
+    def play(self, lines, ship_count):
+        if self.proc is None:
+            self.start()
+        timeout = self.first_timeout if self.turns == 0 else self.timeout
+        self.turns += 1
+        try:
+            self.proc.stdin.write("\n".join(lines) + "\n")
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError):
+            raise TimeoutError("bot exited")
+        deadline = time.perf_counter() + timeout
+        commands = []
+        while len(commands) < ship_count:
+            try:
+                line = self.lines.get(timeout=max(0, deadline - time.perf_counter()))
+            except queue.Empty:
+                raise TimeoutError("timeout after {:.0f}ms".format(timeout * 1000))
+            if line is None:
+                raise TimeoutError("bot exited")
+            commands.append(line.rstrip("\n"))
+        return commands
+
+    def stop(self):
+        if self.proc is not None:
+            try:
+                self.proc.stdin.close()
+            except OSError:
+                pass
+            try:
+                self.proc.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+            self.proc = None
+
+#a player that is a python function taking the input lines and returning the commands
+class FunctionPlayer:
+    def __init__(self, fn):
+        self.fn = fn
+
+    def play(self, lines, ship_count):
+        return self.fn(lines)
+
+    def stop(self):
+        pass
+
+#plays one game between two players, returns a dict with the result
+def play_match(players, seed=None, max_turns=MAX_TURNS, on_turn=None, **kwargs):
+    game = Game(seed, **kwargs)
+    times = [[], []]
+    try:
+        while not game.is_over() and game.turn < max_turns:
+            commands = []
+            for p, player in enumerate(players):
+                lines = game.player_input(p)
+                start = time.perf_counter()
+                try:
+                    commands.append(player.play(lines, len(game.player_ships(p))))
+                except TimeoutError as e:
+                    game.lost[p] = str(e)
+                    commands.append([])
+                times[p].append(time.perf_counter() - start)
+            if game.lost:
+                break
+            game.step(commands)
+            if on_turn is not None:
+                on_turn(game, commands)
+    finally:
+        for player in players:
+            player.stop()
+    return {
+        "seed": seed,
+        "winner": game.winner(),
+        "turns": game.turn,
+        "rum": [game.rum(0), game.rum(1)],
+        "ships": [len(game.player_ships(0)), len(game.player_ships(1))],
+        "lost": dict(game.lost),
+        "max_time": [max(t) if t else 0 for t in times],
+    }
+
+#the command to run a python bot file
+def python_bot(path):
+    return [sys.executable, path]
+
+if __name__ == "__main__":
+    import argparse
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="play a local game of Coders of the Caribbean")
+    parser.add_argument("--p1", default=os.path.join(here, "Pirate.py"), help="python file of the first bot")
+    parser.add_argument("--p2", default=os.path.join(here, "Pirate.py"), help="python file of the second bot")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=TURN_TIMEOUT, help="seconds per turn")
+    parser.add_argument("--first-timeout", type=float, default=FIRST_TURN_TIMEOUT, help="seconds for the first turn")
+    parser.add_argument("--stderr", action="store_true", help="show the debug output of the bots")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.randrange(2**31)
+    stderr = sys.stderr if args.stderr else None
+    players = [ProcessPlayer(python_bot(path), args.first_timeout, args.timeout, stderr) for path in (args.p1, args.p2)]
+    result = play_match(players, seed)
+    print(result)
@@ -0,0 +1,20 @@
+import os
+import sys
+import time
+
+import Pirate
+
+#writes the move cost tables of every cell to Pirate.MOVE_COST_FILE next to Pirate.py
+#the bot memory maps the file when it finds it instead of building tables during the game
+#the file is CELL_COUNT tables of CELL_COUNT * 18 bytes, one per target cell in cell order
+
+def write_move_costs(path):
+    with open(path, "wb") as f:
+        for tc in range(Pirate.CELL_COUNT):
+            f.write(Pirate.build_move_costs(tc))
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), Pirate.MOVE_COST_FILE)
+    start = time.perf_counter()
+    write_move_costs(path)
+    print("wrote {} ({} bytes) in {:.1f}s".format(path, os.path.getsize(path), time.perf_counter() - start))
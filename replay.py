@@ -0,0 +1,141 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+
+import tournament
+
+#plays games recorded with Pirate.py --record back through the bot, turn by turn
+#without --against it checks the bot still plays the log the way it did, with it it diffs two bots
+#bots are given like for tournament.py: self, git:<rev> or a path
+
+#reads a log, returns (header, turns), a turn has the input and the output
+#a bot that was killed may have left half a line at the end, the log stops before it
+def read_log(path):
+    with open(path) as f:
+        header = json.loads(f.readline())
+        turns = []
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            record = json.loads(line)
+            if "values" in record:
+                turns.append(record)
+            else:
+                turns[-1].update(record)
+    return (header, turns)
+
+#the logs in paths, a directory stands for all the .log files in it
+def find_logs(paths):
+    logs = []
+    for path in paths:
+        if os.path.isdir(path):
+            logs.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".log"))
+        else:
+            logs.append(path)
+    return logs
+
+#imports the Pirate.py at path, each file once per process
+MODULES = {}
+
+def load_bot(path):
+    module = MODULES.get(path)
+    if module is None:
+        spec = importlib.util.spec_from_file_location("pirate_{}".format(len(MODULES)), path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.DEBUG = False
+        MODULES[path] = module
+    return module
+
+#makes the clock of bot give the answers it gave when the game was recorded
+#calls past the recorded ones, or for another stage, are allowed
+def script_clock(clock, checks):
+    recorded = iter(checks)
+    def allows(stage):
+        check = next(recorded, None)
+        if check is None or check.lower() != stage[0]:
+            return True
+        return check.isupper()
+    clock.allows = allows
+
+#plays the turns of a log with the bot at path, returns [(commands, seconds)] per turn
+#the bot gets the recorded seed, planner iterations and stage skips, so it plays the same as long as its code does
+def replay(path, header, turns):
+    module = load_bot(path)
+    #revisions from before the params file have nothing to apply them to
+    if "params" in header and hasattr(module, "apply_params"):
+        module.apply_params(header["params"])
+    bot = module.Bot(seed=header["seed"], plan=header["plan"], plan_iterations=0)
+    bot.clock = module.TurnClock(float("inf"), float("inf"))
+    results = []
+    for turn in turns:
+        bot.plan_iterations = turn.get("iterations") or 0
+        bot.start_turn()
+        script_clock(bot.clock, turn.get("checks", ""))
+        start = time.perf_counter()
+        commands = bot.step(turn["values"])
+        results.append((commands, time.perf_counter() - start))
+    return results
+
+#replays one log with bot, and with other when given, in a worker
+def run_log(job):
+    log, bot, other = job
+    header, turns = read_log(log)
+    mine = replay(bot, header, turns)
+    if other is None:
+        theirs = [turn.get("commands") for turn in turns]
+    else:
+        theirs = [commands for commands, seconds in replay(other, header, turns)]
+    diffs = [(turn["turn"], commands, expected) for turn, (commands, seconds), expected in zip(turns, mine, theirs)
+             if expected is not None and commands != expected]
+    slowest, slowest_turn = max((seconds, turn["turn"]) for turn, (commands, seconds) in zip(turns, mine))
+    recorded, recorded_turn = max((turn.get("ms", 0.0), turn["turn"]) for turn in turns)
+    return {
+        "log": log,
+        "turns": len(turns),
+        "died": turns[-1]["turn"] if "commands" not in turns[-1] else None,
+        "diffs": diffs,
+        "slowest_ms": slowest * 1000,
+        "slowest_turn": slowest_turn,
+        "recorded_ms": recorded,
+        "recorded_turn": recorded_turn,
+    }
+
+def run_logs(logs, bot, other=None, workers=None):
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_log, [(log, bot, other) for log in logs]))
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="replay recorded games and diff the commands")
+    parser.add_argument("logs", nargs="+", help="logs written with --record, or directories of them")
+    parser.add_argument("--bot", default="self", help="bot to replay with (default: self)")
+    parser.add_argument("--against", help="bot to diff against instead of the recorded commands")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--show", type=int, default=3, help="differing turns to print per log")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="replay")
+    try:
+        bot = tournament.resolve(args.bot, workdir)
+        other = tournament.resolve(args.against, workdir) if args.against else None
+        results = run_logs(find_logs(args.logs), bot, other, args.workers)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    against = args.against or "the recorded commands"
+    for result in results:
+        died = "" if result["died"] is None else ", died in turn {}".format(result["died"])
+        print("{}: {} turns, {} differ from {}{}".format(result["log"], result["turns"], len(result["diffs"]), against, died))
+        print("  slowest turn {} {:.1f}ms replayed, {} {:.1f}ms recorded".format(
+            result["slowest_turn"], result["slowest_ms"], result["recorded_turn"], result["recorded_ms"]))
+        for turn, commands, expected in result["diffs"][:args.show]:
+            print("  turn {}: {} vs {}".format(turn, commands, expected))
+    same = sum(1 for r in results if not r["diffs"])
+    print("{} of {} games play the same as {}".format(same, len(results), against))
+    sys.exit(0 if same == len(results) else 1)
@@ -0,0 +1,314 @@
+from engine import COOLDOWN_CANNON, COOLDOWN_MINE, REWARD_RUM_BARREL_VALUE
+from Pirate import (CELL_COUNT, CELL_X, CELL_Y, OFF_MAP, MAP_WIDTH, NEIGHBOR_TABLE, BALL_TIME, SHIP_COMMANDS,
+                    MAX_SHIP_SPEED, MAX_RUM_AMOUNT, FIRE_DISTANCE_MAX, LOW_DAMAGE, HIGH_DAMAGE, MINE_DAMAGE,
+                    NEAR_MINE_DAMAGE, cell_index, hex_dist, neighbor, neighbors)
+
+#the whole game in flat lists and bitboards, cheap to copy, as a forward model for search and simulation
+#it plays by the same rules as engine.Game, which stays the reference, the tests check the two agree
+
+#GameState command codes, 0-4 are the SHIP_COMMANDS, FIRE at cell c is FIRE_CODE + c
+MINE_CODE = 5
+FIRE_CODE = 8
+
+#turns a command line into a GameState command code
+def command_code(cmd):
+    if cmd is None:
+        return 0
+    parts = cmd.split()
+    if parts[0] == "FIRE":
+        c = cell_index(int(parts[1]), int(parts[2]))
+        #firing off the map does nothing, like waiting
+        return 0 if c == OFF_MAP else FIRE_CODE + c
+    if parts[0] == "MINE":
+        return MINE_CODE
+    if parts[0] in SHIP_COMMANDS:
+        return SHIP_COMMANDS.index(parts[0])
+    raise ValueError("GameState can't play {!r}".format(cmd))
+
+#the hull of a ship on cell c facing o, filled in when first needed, per c * 6 + o:
+#(bow, center, stern, cells next to or under the hull, bow (x, y))
+#a bow or stern off the map gets a key of its own past CELL_COUNT, so they still tell ships apart
+HULLS = [None] * (CELL_COUNT * 6)
+
+def hull_of(co):
+    hull = HULLS[co]
+    if hull is None:
+        c, o = co // 6, co % 6
+        x, y = CELL_X[c], CELL_Y[c]
+        keys = []
+        near = set()
+        for d in (o, None, (o + 3) % 6):
+            hx, hy = (x, y) if d is None else neighbor(x, y, d)
+            hc = cell_index(hx, hy)
+            keys.append(hc if hc != OFF_MAP else CELL_COUNT + (hy + 1) * (MAP_WIDTH + 2) + hx + 1)
+            for nx, ny in [(hx, hy)] + list(neighbors(hx, hy)):
+                if cell_index(nx, ny) != OFF_MAP:
+                    near.add(cell_index(nx, ny))
+        hull = HULLS[co] = (keys[0], keys[1], keys[2], frozenset(near), neighbor(x, y, o))
+    return hull
+
+#how many of the hulls cover each cell, a ship's own three cells are never the same
+def hull_counts(hulls):
+    taken = {}
+    for hull in hulls:
+        for h in hull:
+            taken[h] = taken.get(h, 0) + 1
+    return taken
+
+#ships are parallel lists in referee order, mines and barrels are bitboards (bit c for cell c)
+#with the rum of each barrel in {cell: rum}, cannonballs are parallel lists too
+#apply() plays a turn by the referee's rules, apply(commands, True) also lets undo() take it back
+class GameState:
+    __slots__ = ("turn", "ship_id", "owner", "cell", "orient", "speed", "rum", "cannon_cd", "mine_cd",
+                 "mines", "barrels", "barrel_rum", "ball_cell", "ball_time", "ball_owner", "history")
+
+    def __init__(self):
+        self.turn = 0
+        self.ship_id = []
+        self.owner = []
+        self.cell = []
+        self.orient = []
+        self.speed = []
+        self.rum = []
+        self.cannon_cd = []
+        self.mine_cd = []
+        self.mines = 0
+        self.barrels = 0
+        self.barrel_rum = {}
+        self.ball_cell = []
+        self.ball_time = []
+        self.ball_owner = []
+        self.history = []
+
+    #the state of a Pirate.World, our ships are owner 1 and the enemies 0 as in the input
+    #cooldowns: {ship id: (cannon, mine)} turns left, mines: extra mine cells we remember
+    @classmethod
+    def from_world(cls, world, cooldowns=None, mines=()):
+        state = cls()
+        for ship in world.ships():
+            cannon, mine = (cooldowns or {}).get(ship.id, (0, 0))
+            state.add_ship(ship.id, ship.mine, ship.cell, ship.orient, ship.speed, ship.rum, cannon, mine)
+        for mine in world.mines():
+            state.mines |= 1 << mine.cell
+        for c in mines:
+            state.mines |= 1 << c
+        for barrel in world.barrels():
+            state.add_barrel(barrel.cell, barrel.rum)
+        for ball in world.cannonballs():
+            state.ball_cell.append(ball.cell)
+            state.ball_time.append(ball.time)
+            state.ball_owner.append(ball.owner)
+        return state
+
+    #the state of an engine.Game, with everything the referee knows
+    @classmethod
+    def from_game(cls, game):
+        state = cls()
+        state.turn = game.turn
+        for s in game.ships:
+            state.add_ship(s.id, s.owner, cell_index(*s.pos), s.orient, s.speed, s.health, s.cannon_cooldown, s.mine_cooldown)
+        for m in game.mines:
+            state.mines |= 1 << cell_index(*m.pos)
+        for b in game.barrels:
+            state.add_barrel(cell_index(*b.pos), b.rum)
+        for b in game.cannonballs:
+            state.ball_cell.append(cell_index(*b.pos))
+            state.ball_time.append(b.time)
+            state.ball_owner.append(b.owner)
+        return state
+
+    def add_ship(self, id, owner, c, o, s, rum, cannon_cd=0, mine_cd=0):
+        self.ship_id.append(id)
+        self.owner.append(owner)
+        self.cell.append(c)
+        self.orient.append(o)
+        self.speed.append(s)
+        self.rum.append(rum)
+        self.cannon_cd.append(cannon_cd)
+        self.mine_cd.append(mine_cd)
+
+    def add_barrel(self, c, rum):
+        self.barrels |= 1 << c
+        self.barrel_rum[c] = self.barrel_rum.get(c, 0) + rum
+
+    def snapshot(self):
+        return (self.turn, self.ship_id[:], self.owner[:], self.cell[:], self.orient[:], self.speed[:], self.rum[:],
+                self.cannon_cd[:], self.mine_cd[:], self.mines, self.barrels, self.barrel_rum.copy(),
+                self.ball_cell[:], self.ball_time[:], self.ball_owner[:])
+
+    def restore(self, snap):
+        (self.turn, self.ship_id, self.owner, self.cell, self.orient, self.speed, self.rum,
+         self.cannon_cd, self.mine_cd, self.mines, self.barrels, self.barrel_rum,
+         self.ball_cell, self.ball_time, self.ball_owner) = snap
+
+    def clone(self):
+        state = GameState()
+        state.restore(self.snapshot())
+        return state
+
+    #takes back the last apply(commands, True)
+    def undo(self):
+        self.restore(self.history.pop())
+
+    def hull(self, i):
+        return hull_of(self.cell[i] * 6 + self.orient[i])
+
+    #the ships that ran over something, and the mines under ships go off
+    def check_collisions(self):
+        n = len(self.cell)
+        hulls = [self.hull(i)[:3] for i in range(n)]
+        if self.barrels:
+            for i in range(n):
+                for h in hulls[i]:
+                    if h < CELL_COUNT and self.barrels >> h & 1:
+                        self.rum[i] = min(MAX_RUM_AMOUNT, self.rum[i] + self.barrel_rum.pop(h))
+                        self.barrels &= ~(1 << h)
+        if self.mines:
+            for i in range(n):
+                for h in hulls[i]:
+                    if h < CELL_COUNT and self.mines >> h & 1:
+                        self.explode_mine(h)
+
+    #a mine goes off, the ships on it take MINE_DAMAGE and the ones next to it NEAR_MINE_DAMAGE
+    def explode_mine(self, m):
+        self.mines &= ~(1 << m)
+        victim = None
+        for i in range(len(self.cell)):
+            if m in self.hull(i)[:3]:
+                self.rum[i] = max(0, self.rum[i] - MINE_DAMAGE)
+                victim = i
+        for i in range(len(self.cell)):
+            if i != victim and m in self.hull(i)[3]:
+                self.rum[i] = max(0, self.rum[i] - NEAR_MINE_DAMAGE)
+
+    #plays one turn, commands has a command code for every ship in order
+    #with undoable the state before is kept in history for undo(), callers that clone instead leave it off
+    def apply(self, commands, undoable=False):
+        if undoable:
+            self.history.append(self.snapshot())
+        n = len(self.cell)
+
+        #cannonballs come down
+        explosions = []
+        if self.ball_cell:
+            cells, times, owners = [], [], []
+            for c, t, owner in zip(self.ball_cell, self.ball_time, self.ball_owner):
+                if t == 0:
+                    continue
+                if t == 1:
+                    explosions.append(c)
+                cells.append(c)
+                times.append(t - 1)
+                owners.append(owner)
+            self.ball_cell, self.ball_time, self.ball_owner = cells, times, owners
+
+        self.rum = [r - 1 if r > 0 else 0 for r in self.rum]
+        initial = self.rum[:]
+
+        #the commands
+        new_orient = self.orient[:]
+        for i in range(n):
+            if self.mine_cd[i] > 0:
+                self.mine_cd[i] -= 1
+            if self.cannon_cd[i] > 0:
+                self.cannon_cd[i] -= 1
+            code = commands[i]
+            if code == 0:
+                continue
+            if code == 1:
+                self.speed[i] = min(self.speed[i] + 1, MAX_SHIP_SPEED)
+            elif code == 2:
+                self.speed[i] = max(self.speed[i] - 1, 0)
+            elif code == 3:
+                new_orient[i] = (self.orient[i] + 1) % 6
+            elif code == 4:
+                new_orient[i] = (self.orient[i] + 5) % 6
+            elif code == MINE_CODE:
+                if self.mine_cd[i] == 0:
+                    stern = self.hull(i)[2]
+                    target = NEIGHBOR_TABLE[stern * 6 + (self.orient[i] + 3) % 6] if stern < CELL_COUNT else OFF_MAP
+                    if target != OFF_MAP and not (self.barrels | self.mines) >> target & 1:
+                        if not any(j != i and target in self.hull(j)[:3] for j in range(n)):
+                            self.mine_cd[i] = COOLDOWN_MINE
+                            self.mines |= 1 << target
+            elif code >= FIRE_CODE:
+                target = code - FIRE_CODE
+                bx, by = self.hull(i)[4]
+                d = hex_dist(bx, by, CELL_X[target], CELL_Y[target])
+                if d <= FIRE_DISTANCE_MAX and self.cannon_cd[i] == 0:
+                    self.ball_cell.append(target)
+                    self.ball_time.append(BALL_TIME[d])
+                    self.ball_owner.append(self.ship_id[i])
+                    self.cannon_cd[i] = COOLDOWN_CANNON
+
+        #the ships move a cell at a time, ones that run into a ship go back and stop
+        for step in range(1, MAX_SHIP_SPEED + 1):
+            if not any(s >= step for s in self.speed):
+                break
+            new_cell = self.cell[:]
+            for i in range(n):
+                if step <= self.speed[i]:
+                    nxt = NEIGHBOR_TABLE[self.cell[i] * 6 + self.orient[i]]
+                    if nxt != OFF_MAP:
+                        new_cell[i] = nxt
+                    else:
+                        self.speed[i] = 0
+            while True:
+                hulls = [hull_of(new_cell[i] * 6 + self.orient[i])[:3] for i in range(n)]
+                taken = hull_counts(hulls)
+                hit = [i for i in range(n) if taken[hulls[i][0]] > 1]
+                if not hit:
+                    break
+                for i in hit:
+                    new_cell[i] = self.cell[i]
+                    self.speed[i] = 0
+            self.cell = new_cell
+            self.check_collisions()
+
+        #then they turn, ones that would turn into a ship don't and stop
+        if new_orient != self.orient:
+            while True:
+                hulls = [hull_of(self.cell[i] * 6 + new_orient[i])[:3] for i in range(n)]
+                taken = hull_counts(hulls)
+                hit = [i for i in range(n) if taken[hulls[i][0]] > 1 or taken[hulls[i][1]] > 1 or taken[hulls[i][2]] > 1]
+                if not hit:
+                    break
+                for i in hit:
+                    new_orient[i] = self.orient[i]
+                    self.speed[i] = 0
+            self.orient = new_orient
+        self.check_collisions()
+
+        #the cannonballs hit ships, then mines, then barrels
+        left = []
+        for c in explosions:
+            for i in range(n):
+                bow, center, stern = self.hull(i)[:3]
+                if c == bow or c == stern:
+                    self.rum[i] = max(0, self.rum[i] - LOW_DAMAGE)
+                    break
+                elif c == center:
+                    self.rum[i] = max(0, self.rum[i] - HIGH_DAMAGE)
+                    break
+            else:
+                left.append(c)
+        explosions, left = left, []
+        for c in explosions:
+            if self.mines >> c & 1:
+                self.explode_mine(c)
+            else:
+                left.append(c)
+        for c in left:
+            if self.barrels >> c & 1:
+                self.barrels &= ~(1 << c)
+                del self.barrel_rum[c]
+
+        #sunk ships leave a barrel with the rum they had at the start of the turn
+        for i in reversed(range(n)):
+            if self.rum[i] <= 0:
+                reward = min(REWARD_RUM_BARREL_VALUE, initial[i])
+                if reward > 0:
+                    self.add_barrel(self.cell[i], reward)
+                for field in (self.ship_id, self.owner, self.cell, self.orient, self.speed, self.rum, self.cannon_cd, self.mine_cd):
+                    del field[i]
+        self.turn += 1
@@ -0,0 +1,54 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import engine
+import Pirate
+
+Pirate.DEBUG = False
+
+#the shots the bot picks have to land where the referee puts the enemy when the ball comes down
+
+#a game with our ship sitting still on player 0's side and an enemy sailing east at speed
+def sailing_game(speed, our_pos=(8, 12), enemy_pos=(2, 5)):
+    game = engine.Game(seed=0, ship_count=1, mine_count=0, barrel_count=0)
+    ours, enemy = game.player_ships(0)[0], game.player_ships(1)[0]
+    ours.pos, ours.orient, ours.speed = our_pos, 1, 0
+    enemy.pos, enemy.orient, enemy.speed = enemy_pos, 0, speed
+    return game, ours, enemy
+
+#the best shot our ship has, as the command the bot would send
+#the bot has seen the enemy keep its course, so it expects it to go on
+def best_shot(game, ship_id, enemy_id):
+    bot = Pirate.Bot(seed=0, plan=False)
+    bot.world.load(Pirate.parse_lines(game.player_input(0)[2:]))
+    bot.enemies.observe(bot.world, bot.prev_ship)
+    bot.enemies.counts[enemy_id] = [1.0, 0.0, 0.0, 0.0, 0.0]
+    bot.action = {ship_id: "WAIT"}
+    options = bot.fire_options(bot.world.entities[ship_id], bot.friendly_hulls([ship_id]))
+    c = options[0][1]
+    return "FIRE {} {}".format(Pirate.CELL_X[c], Pirate.CELL_Y[c])
+
+class FireTest(unittest.TestCase):
+    def check_hit(self, speed, **positions):
+        game, ours, enemy = sailing_game(speed, **positions)
+        game.step([[best_shot(game, ours.id, enemy.id)], ["WAIT"]])
+        self.assertEqual(len(game.cannonballs), 1)
+        while game.cannonballs:
+            game.step([["WAIT"], ["WAIT"]])
+        #the rum runs out by one a turn, anything more is the cannonball
+        self.assertLess(enemy.health, engine.INITIAL_SHIP_HEALTH - game.turn)
+
+    def test_hits_ship_at_speed_1(self):
+        self.check_hit(1)
+
+    def test_hits_ship_at_speed_2(self):
+        self.check_hit(2)
+
+    def test_hits_ship_far_away(self):
+        self.check_hit(2, our_pos=(8, 16), enemy_pos=(1, 7))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import sys
+import random
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import engine
+from state import GameState, command_code
+
+#GameState has to play every turn the way engine.Game does, checked over games of random commands
+
+COMMANDS = ["WAIT", "FASTER", "SLOWER", "PORT", "STARBOARD", "MINE"]
+
+#everything the referee keeps that GameState has to agree on
+def summary(state):
+    ships = list(zip(state.ship_id, state.owner, state.cell, state.orient, state.speed, state.rum, state.cannon_cd, state.mine_cd))
+    balls = sorted(zip(state.ball_cell, state.ball_time, state.ball_owner))
+    return (state.turn, ships, state.mines, state.barrels, sorted(state.barrel_rum.items()), balls)
+
+def random_command(rnd, ship):
+    if rnd.random() < 0.3:
+        #a few land off the map or out of range on purpose
+        return "FIRE {} {}".format(rnd.randint(-1, engine.MAP_WIDTH), rnd.randint(-1, engine.MAP_HEIGHT))
+    return rnd.choice(COMMANDS)
+
+class GameStateTest(unittest.TestCase):
+    def test_apply_matches_engine(self):
+        turns = 0
+        for seed in range(60):
+            rnd = random.Random(seed)
+            game = engine.Game(seed=seed)
+            state = GameState.from_game(game)
+            while not game.is_over():
+                commands = {ship.id: random_command(rnd, ship) for ship in game.ships}
+                state.apply([command_code(commands[ship.id]) for ship in game.ships])
+                game.step([[commands[s.id] for s in game.player_ships(p)] for p in (0, 1)])
+                self.assertEqual(summary(state), summary(GameState.from_game(game)), "seed {} turn {}".format(seed, game.turn))
+                turns += 1
+        self.assertGreater(turns, 1000)
+
+    def test_undo(self):
+        rnd = random.Random(1)
+        game = engine.Game(seed=1)
+        state = GameState.from_game(game)
+        before = summary(state)
+        for turn in range(20):
+            state.apply([command_code(random_command(rnd, None)) for i in state.cell], True)
+        for turn in range(20):
+            state.undo()
+        self.assertEqual(summary(state), before)
+        self.assertEqual(state.history, [])
+
+    def test_apply_keeps_no_history_by_default(self):
+        state = GameState.from_game(engine.Game(seed=2))
+        for turn in range(50):
+            state.apply([0] * len(state.cell))
+        self.assertEqual(state.history, [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,216 @@
+import os
+import sys
+import math
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import engine
+
+#runs many local games of a bot against an opponent on all cores and reports how it did
+#a bot is given as one of:
+#   self                the Pirate.py next to this file
+#   inproc              the Pirate.py next to this file, run inside the worker instead of as a process
+#   git:<rev>           Pirate.py as of a git revision
+#   baseline:<name>     one of the scripted bots in BASELINES
+#   <path>              any python bot file
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+#scripted baselines, they only use the built in MOVE autopilot
+def parse_ships(lines):
+    ships, barrels = [], []
+    for line in lines[2:]:
+        parts = line.split()
+        if parts[1] == "SHIP":
+            ships.append((int(parts[2]), int(parts[3]), int(parts[7])))
+        elif parts[1] == "BARREL":
+            barrels.append((int(parts[2]), int(parts[3])))
+    return ([s for s in ships if s[2] == 1], [s for s in ships if s[2] == 0], barrels)
+
+#sits still and lets the rum run out
+def waiting_bot(lines):
+    return ["WAIT"] * int(lines[0])
+
+#sails to the closest barrel, then to the closest enemy
+def barrel_bot(lines):
+    mine, enemies, barrels = parse_ships(lines)
+    commands = []
+    for x, y, _ in mine:
+        targets = barrels or [(e[0], e[1]) for e in enemies]
+        tx, ty = min(targets, key=lambda t: engine.dist((x, y), t))
+        commands.append("MOVE {} {}".format(tx, ty))
+    return commands
+
+#like barrel_bot, but fires at the closest enemy every other turn when it is in range
+#one per game, workers play many games and the turn count must not carry over
+class ShootingBot:
+    def __init__(self):
+        self.turn = 0
+        
+    def __call__(self, lines):
+        mine, enemies, barrels = parse_ships(lines)
+        commands = barrel_bot(lines)
+        self.turn += 1
+        if self.turn % 2 == 0:
+            for i, (x, y, _) in enumerate(mine):
+                ex, ey, _ = min(enemies, key=lambda e: engine.dist((x, y), (e[0], e[1])))
+                if engine.dist((x, y), (ex, ey)) <= engine.FIRE_DISTANCE_MAX:
+                    commands[i] = "FIRE {} {}".format(ex, ey)
+        return commands
+
+#name -> makes the bot for one game
+BASELINES = {
+    "wait": lambda: waiting_bot,
+    "barrel": lambda: barrel_bot,
+    "shooter": ShootingBot,
+}
+
+#turn a bot spec into something a worker can build a player from
+def resolve(spec, workdir):
+    if spec == "self":
+        return os.path.join(HERE, "Pirate.py")
+    if spec == "inproc":
+        return spec
+    if spec.startswith("baseline:"):
+        if spec[9:] not in BASELINES:
+            raise SystemExit("unknown baseline {!r}, pick one of {}".format(spec[9:], ", ".join(sorted(BASELINES))))
+        return spec
+    if spec.startswith("git:"):
+        rev = spec[4:]
+        source = subprocess.check_output(["git", "show", "{}:Pirate.py".format(rev)], cwd=HERE)
+        path = os.path.join(workdir, "Pirate_{}.py".format(rev.replace("/", "_").replace("~", "_").replace("^", "_")))
+        with open(path, "wb") as f:
+            f.write(source)
+        return path
+    if not os.path.exists(spec):
+        raise SystemExit("no bot at {!r}".format(spec))
+    return spec
+
+#record is a directory the bot writes a log of the game to, see replay.py
+def make_player(bot, first_timeout, timeout, record=None):
+    if bot.startswith("baseline:"):
+        return engine.FunctionPlayer(BASELINES[bot[9:]]())
+    if bot == "inproc":
+        import Pirate
+        Pirate.DEBUG = False
+        return engine.FunctionPlayer(Pirate.Bot().play_lines)
+    cmd = engine.python_bot(bot)
+    if record is not None:
+        cmd += ["--record", record]
+    return engine.ProcessPlayer(cmd, first_timeout, timeout)
+
+#plays one game in a worker, the result is from the point of view of the candidate
+def run_game(job):
+    candidate, opponent, seed, swap, first_timeout, timeout, record = job
+    players = [make_player(candidate, first_timeout, timeout, record), make_player(opponent, first_timeout, timeout)]
+    if swap:
+        players.reverse()
+    result = engine.play_match(players, seed)
+    me = 1 if swap else 0
+    if result["winner"] is None:
+        outcome = "draw"
+    else:
+        outcome = "win" if result["winner"] == me else "loss"
+    return {
+        "seed": seed,
+        "swap": swap,
+        "outcome": outcome,
+        "turns": result["turns"],
+        "rum": result["rum"][me],
+        "opponent_rum": result["rum"][1 - me],
+        "timeout": me in result["lost"],
+        "opponent_timeout": (1 - me) in result["lost"],
+        "max_time": result["max_time"][me],
+    }
+
+#wilson score interval for a win rate, draws count as half a win
+def wilson_interval(score, n, z=1.96):
+    if n == 0:
+        return (0.0, 1.0)
+    p = score / n
+    center = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return (max(0.0, center - half), min(1.0, center + half))
+
+def summarize(results, elapsed):
+    n = len(results)
+    wins = sum(1 for r in results if r["outcome"] == "win")
+    losses = sum(1 for r in results if r["outcome"] == "loss")
+    draws = n - wins - losses
+    score = wins + draws / 2.0
+    low, high = wilson_interval(score, n)
+    return {
+        "games": n,
+        "wins": wins,
+        "losses": losses,
+        "draws": draws,
+        "win_rate": score / n if n else 0.0,
+        "win_rate_95": [low, high],
+        "avg_rum": sum(r["rum"] for r in results) / float(n) if n else 0.0,
+        "avg_rum_diff": sum(r["rum"] - r["opponent_rum"] for r in results) / float(n) if n else 0.0,
+        "avg_turns": sum(r["turns"] for r in results) / float(n) if n else 0.0,
+        "timeouts": sum(1 for r in results if r["timeout"]),
+        "opponent_timeouts": sum(1 for r in results if r["opponent_timeout"]),
+        "max_turn_time": max([r["max_time"] for r in results] or [0]),
+        "seconds": elapsed,
+        "games_per_sec": n / elapsed if elapsed > 0 else 0.0,
+    }
+
+#plays games games of candidate against opponent, each seed once from each side
+def run_tournament(candidate, opponent, games, seed=0, workers=None, first_timeout=engine.FIRST_TURN_TIMEOUT, timeout=engine.TURN_TIMEOUT, progress=None, record=None):
+    jobs = [(candidate, opponent, seed + i // 2, i % 2 == 1, first_timeout, timeout, record) for i in range(games)]
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_game, job) for job in jobs]
+        for future in as_completed(futures):
+            results.append(future.result())
+            if progress is not None:
+                progress(len(results), games)
+    results.sort(key=lambda r: (r["seed"], r["swap"]))
+    return (summarize(results, time.perf_counter() - start), results)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="play a local tournament between two bots")
+    parser.add_argument("candidate", nargs="?", default="self", help="bot to evaluate (default: self)")
+    parser.add_argument("opponent", nargs="?", default="self", help="bot to play against (default: self)")
+    parser.add_argument("-n", "--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first map")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--timeout", type=float, default=engine.TURN_TIMEOUT, help="seconds per turn")
+    parser.add_argument("--first-timeout", type=float, default=engine.FIRST_TURN_TIMEOUT, help="seconds for the first turn")
+    parser.add_argument("--json", help="write every game result to this file")
+    parser.add_argument("--record", help="directory the candidate writes a log of every game to, for replay.py")
+    args = parser.parse_args()
+    if args.record is not None:
+        if args.candidate == "inproc" or args.candidate.startswith("baseline:"):
+            raise SystemExit("only a bot that runs as a process can record its games")
+        args.record = os.path.abspath(args.record)
+        os.makedirs(args.record, exist_ok=True)
+
+    workdir = tempfile.mkdtemp(prefix="tournament")
+    try:
+        candidate = resolve(args.candidate, workdir)
+        opponent = resolve(args.opponent, workdir)
+        def progress(done, total):
+            print("\r{}/{} games".format(done, total), end="", file=sys.stderr)
+        summary, results = run_tournament(candidate, opponent, args.games, args.seed, args.workers, args.first_timeout, args.timeout, progress, args.record)
+        print(file=sys.stderr)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("{} vs {}".format(args.candidate, args.opponent))
+    print("games:      {games} (+{wins} -{losses} ={draws})".format(**summary))
+    print("win rate:   {:.1%}  95% CI [{:.1%}, {:.1%}]".format(summary["win_rate"], *summary["win_rate_95"]))
+    print("rum:        {:.1f} avg, {:+.1f} avg difference".format(summary["avg_rum"], summary["avg_rum_diff"]))
+    print("turns:      {:.1f} avg".format(summary["avg_turns"]))
+    print("timeouts:   {} ({} for the opponent), slowest turn {:.0f}ms".format(summary["timeouts"], summary["opponent_timeouts"], summary["max_turn_time"] * 1000))
+    print("throughput: {:.2f} games/sec in {:.1f}s".format(summary["games_per_sec"], summary["seconds"]))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"summary": summary, "games": results}, f, indent=1)
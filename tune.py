@@ -0,0 +1,213 @@
+import os
+import sys
+import json
+import random
+import shutil
+import hashlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import engine
+import tournament
+import Pirate
+
+#tunes the constants in Pirate.TUNABLE_PARAMS with local games against an opponent, on all cores
+#successive halving: lots of candidates play a few games, the better half plays twice as many, until one is left
+#every game is cached by (params, opponent, seed, side), so a run that is stopped or repeated goes on where it was
+#that only holds for games that play the same every time: the bots get a fixed seed and a fixed number of planner
+#iterations instead of a time limit, and opponents that can't be made repeatable are played again every time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+#planner iterations a turn in tuning games, about what PLAN_TIME gets on a turn
+TUNE_PLAN_ITERATIONS = 500
+#seconds per turn in tuning games, the bots don't keep to their time budget when they play repeatably
+TUNE_TIMEOUT = 1.0
+
+#(low, high) each constant is tried in, ints stay ints
+PARAM_RANGES = {
+    "COLLISION_PENALTY": (1, 20),
+    "PREDICT_DECAY": (0.5, 0.99),
+    "PREDICT_MIN_PROB": (0.001, 0.05),
+    "MIN_SHOT_VALUE": (0, 30),
+    "MINE_CONFIDENCE_DECAY": (0.8, 1.0),
+    "PLAN_DISCOUNT": (0.5, 1.0),
+    "TARGET_PULL": (0.5, 10.0),
+    "PLAN_MUTATIONS": (1, 6),
+    "BARREL_CANDIDATES": (1, 8),
+    "HUNGRY_RUM": (50, 100),
+    "SHARING_RUM": (10, 60),
+    "SHARING_MARGIN": (0, 6),
+    "CHASE_DISTANCE": (5, 15),
+    "MIN_MINE_VALUE": (0, 30),
+}
+
+#a copy of params with about half of them moved by sigma times their range
+def mutate(params, rng, sigma):
+    params = dict(params)
+    for name, (low, high) in PARAM_RANGES.items():
+        if rng.random() < 0.5:
+            continue
+        value = min(high, max(low, params[name] + rng.gauss(0, sigma * (high - low))))
+        params[name] = int(round(value)) if isinstance(params[name], int) else round(value, 4)
+    return params
+
+#short name of a parameter set, for the cache and the params files of the workers
+def params_key(params):
+    return hashlib.md5(json.dumps(params, sort_keys=True).encode()).hexdigest()[:12]
+
+#what a bot plays like: its code and the params file next to it, a baseline is just its name
+def bot_version(bot):
+    if not os.path.exists(bot):
+        return bot
+    digest = hashlib.md5()
+    for path in (bot, os.path.join(os.path.dirname(bot), Pirate.PARAMS_FILE)):
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+def load_cache(path):
+    if path is None or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_cache(cache, path):
+    if path is None:
+        return
+    with open(path + ".tmp", "w") as f:
+        json.dump(cache, f)
+    os.replace(path + ".tmp", path)
+
+#true if games against opponent play the same every time: a scripted baseline, or this bot that takes --seed
+#and the planner iterations from a params file, older revisions and other bots may not
+def repeatable(opponent_spec):
+    return opponent_spec == "self" or opponent_spec.startswith("baseline:")
+
+#plays one game of the bot with a params file against opponent in a worker, 1 for a win, .5 for a draw
+#opponent_params is the params file of an opponent that is this bot, None for any other
+def play_game(job):
+    bot, params_path, opponent, opponent_params, seed, swap, first_timeout, timeout = job
+    args = ["--seed", str(seed)]
+    if opponent_params is not None:
+        opponent_player = engine.ProcessPlayer(engine.python_bot(opponent) + ["--params", opponent_params] + args, first_timeout, timeout)
+    else:
+        opponent_player = tournament.make_player(opponent, first_timeout, timeout)
+    players = [engine.ProcessPlayer(engine.python_bot(bot) + ["--params", params_path] + args, first_timeout, timeout),
+               opponent_player]
+    if swap:
+        players.reverse()
+    result = engine.play_match(players, seed)
+    if result["winner"] is None:
+        return 0.5
+    return 1.0 if result["winner"] == (1 if swap else 0) else 0.0
+
+class Tuner:
+    def __init__(self, opponent="self", seed=1000, workers=None, cache_path=None,
+                 first_timeout=TUNE_TIMEOUT, timeout=TUNE_TIMEOUT):
+        self.opponent_spec = opponent
+        self.seed = seed
+        self.workers = workers
+        self.cache_path = cache_path
+        self.cache = load_cache(cache_path)
+        self.first_timeout = first_timeout
+        self.timeout = timeout
+
+    #a game is only played again when the bot's code, its params, the opponent or the map change
+    def game_key(self, params, seed, swap):
+        return "{}|{}|{}|{}|{}|{}".format(self.bot_version, params_key(params), TUNE_PLAN_ITERATIONS, self.opponent_version, seed, int(swap))
+
+    #the average score of every parameter set over games games
+    #only the ones not in the cache are played, all of them when the opponent isn't repeatable
+    def evaluate(self, candidates, games, progress=None):
+        jobs = {}
+        for params in candidates:
+            path = self.params_file(params_key(params), dict(params, PLAN_ITERATIONS=TUNE_PLAN_ITERATIONS))
+            for i in range(games):
+                seed, swap = self.seed + i // 2, i % 2 == 1
+                key = self.game_key(params, seed, swap)
+                if key not in self.cache or not self.repeatable:
+                    jobs[key] = (self.bot, path, self.opponent, self.opponent_params, seed, swap, self.first_timeout, self.timeout)
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = dict((pool.submit(play_game, job), key) for key, job in jobs.items())
+            for done, future in enumerate(as_completed(futures), 1):
+                self.cache[futures[future]] = future.result()
+                if progress is not None:
+                    progress(done, len(jobs))
+        save_cache(self.cache, self.cache_path)
+        return [sum(self.cache[self.game_key(params, self.seed + i // 2, i % 2 == 1)] for i in range(games)) / games
+                for params in candidates]
+
+    #writes params to a file in the work directory for the bots to load, returns its path
+    def params_file(self, name, params):
+        path = os.path.join(self.workdir, "params-{}.json".format(name))
+        with open(path, "w") as f:
+            json.dump(params, f)
+        return path
+
+    #successive halving from start and candidates - 1 mutations of it, returns [(params, score, games)] per round
+    def run(self, start, candidates=16, games=8, sigma=0.2, rng=None, progress=None):
+        rng = rng or random.Random()
+        pool = [start] + [mutate(start, rng, sigma) for i in range(candidates - 1)]
+        rounds = []
+        self.workdir = tempfile.mkdtemp(prefix="tune")
+        try:
+            self.bot = tournament.resolve("self", self.workdir)
+            self.opponent = tournament.resolve(self.opponent_spec, self.workdir)
+            with open(self.bot, "rb") as f:
+                self.bot_version = hashlib.md5(f.read()).hexdigest()[:12]
+            self.opponent_version = bot_version(self.opponent)
+            self.repeatable = repeatable(self.opponent_spec)
+            #the opponent keeps its own params, only the planner gets the same fixed iterations
+            self.opponent_params = None
+            if self.opponent_spec == "self":
+                self.opponent_params = self.params_file("opponent", {"PLAN_ITERATIONS": TUNE_PLAN_ITERATIONS})
+            while True:
+                scores = self.evaluate(pool, games, progress)
+                ranked = sorted(zip(scores, range(len(pool))), key=lambda r: -r[0])
+                rounds.append([(pool[n], score, games) for score, n in ranked])
+                if len(pool) == 1:
+                    break
+                pool = [pool[n] for score, n in ranked[:max(1, len(pool) // 2)]]
+                games *= 2
+        finally:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+        return rounds
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="tune the constants of Pirate.py with local games")
+    parser.add_argument("opponent", nargs="?", default="self", help="bot to play against, as for tournament.py (default: self)")
+    parser.add_argument("-c", "--candidates", type=int, default=16, help="parameter sets in the first round")
+    parser.add_argument("-n", "--games", type=int, default=8, help="games per candidate in the first round, doubled each round")
+    parser.add_argument("--sigma", type=float, default=0.2, help="how far candidates move from the start, as a part of each range")
+    parser.add_argument("--seed", type=int, default=1000, help="seed of the first map")
+    parser.add_argument("--random-seed", type=int, default=None, help="seed for making the candidates")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--timeout", type=float, default=TUNE_TIMEOUT, help="seconds per turn")
+    parser.add_argument("--first-timeout", type=float, default=TUNE_TIMEOUT, help="seconds for the first turn")
+    parser.add_argument("--cache", default=os.path.join(HERE, "tune_cache.json"), help="file the game results are kept in")
+    parser.add_argument("--out", default=os.path.join(HERE, Pirate.PARAMS_FILE), help="where the best parameters go, the bot loads them from here")
+    args = parser.parse_args()
+
+    #start from what the bot plays with now, including the params file it loaded
+    start = Pirate.current_params()
+    tuner = Tuner(args.opponent, args.seed, args.workers, args.cache, args.first_timeout, args.timeout)
+    def progress(done, total):
+        print("\r{}/{} games".format(done, total), end="", file=sys.stderr)
+    rounds = tuner.run(start, args.candidates, args.games, args.sigma, random.Random(args.random_seed), progress)
+    print(file=sys.stderr)
+
+    for n, ranked in enumerate(rounds):
+        start_score = [score for params, score, games in ranked if params == start]
+        print("round {}: {} candidates, {} games each, best {:.1%}{}".format(
+            n + 1, len(ranked), ranked[0][2], ranked[0][1],
+            ", start {:.1%}".format(start_score[0]) if start_score else ""))
+    best, score, games = rounds[-1][0]
+    for name in Pirate.TUNABLE_PARAMS:
+        if best[name] != start[name]:
+            print("  {}: {} -> {}".format(name, start[name], best[name]))
+    with open(args.out, "w") as f:
+        json.dump(best, f, indent=1, sort_keys=True)
+    print("{:.1%} over {} games against {}, written to {}".format(score, games, args.opponent, args.out))